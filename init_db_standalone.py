@@ -24,7 +24,7 @@ database_url = os.getenv(
 
 # Convert async driver to sync
 sync_url = database_url.replace("+asyncpg", "")
-engine = create_engine(sync_url, echo=True)
+engine = create_engine(sync_url, echo=False)
 
 print("👉 Creating tables...")
 Base.metadata.create_all(bind=engine)
@@ -2,20 +2,54 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
 from datetime import datetime
+from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
-from sqlalchemy import select
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    FastAPI,
+    HTTPException,
+    Request,
+    UploadFile,
+)
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..dependencies import get_db, get_sp_api_client
+from ..core.config import settings
+from ..core.logging import logger
+from ..dependencies import get_db, get_db_factory, get_sp_api_client, get_sp_api_factory, utc_now
 from ..models import Marketplace, PriceEvent, Sku
-from ..schemas import BulkFeedUploadResponse, ManualPriceUpdate, ManualRepriceRequest
+from ..schemas import (
+    BulkFeedUploadResponse,
+    ManualPriceBatchResult,
+    ManualPriceFailure,
+    ManualPriceUpdate,
+    ManualRepriceRequest,
+)
 from ..services.sp_api import SPAPIClient
+from .dashboard import invalidate_dashboard
 
 router = APIRouter()
 
 
+def _submission_slots(app: FastAPI) -> asyncio.Semaphore:
+    """Return the app's bound on concurrent manual-price SP-API submissions."""
+
+    # Created on first use, inside the loop serving the app, with the settings it runs
+    # with.
+    slots = getattr(app.state, "submission_slots", None)
+    if slots is None:
+        slots = app.state.submission_slots = asyncio.Semaphore(
+            max(1, settings.repricing_concurrency)
+        )
+    return slots
+
+
 @router.post("/manual-reprice")
 async def manual_reprice(
     request: Request,
@@ -27,14 +61,21 @@ async def manual_reprice(
     await scheduler.trigger_marketplace(
         payload.marketplace_code, reason="manual", profile_id=payload.profile_id
     )
+    invalidate_dashboard(request.app)
     return {"status": "scheduled"}
 
 
 @router.post("/manual-price", response_model=ManualPriceUpdate)
 async def manual_price_update(
+    request: Request,
     payload: ManualPriceUpdate,
+    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_db),
-    client: SPAPIClient = Depends(get_sp_api_client),
+    session_scope: Callable[[], AbstractAsyncContextManager[AsyncSession]] = Depends(
+        get_db_factory
+    ),
+    client_factory: Callable[[], Awaitable[SPAPIClient]] = Depends(get_sp_api_factory),
+    now: datetime = Depends(utc_now),
 ) -> ManualPriceUpdate:
     marketplace = await session.scalar(select(Marketplace).where(Marketplace.code == payload.marketplace_code))
     if marketplace is None:
@@ -44,43 +85,173 @@ async def manual_price_update(
     )
     if sku is None:
         raise HTTPException(status_code=404, detail="SKU not found")
-    old_price = sku.last_updated_price
-    old_business = sku.last_updated_business_price
-    await client.submit_price_update(
+    event = PriceEvent(
+        sku_id=sku.id,
+        created_at=now,
+        old_price=sku.last_updated_price,
+        new_price=payload.price,
+        old_business_price=sku.last_updated_business_price,
+        new_business_price=payload.business_price,
+        reason="manual",
+        context={"source": "manual", "status": "pending_submit"},
+    )
+    session.add(event)
+    await session.commit()
+    # The SP-API round-trip runs after the response is sent, so the request only holds
+    # its pool connection for the local commit. The SKU keeps its current price until
+    # Amazon has accepted the new one.
+    background_tasks.add_task(
+        _submit_manual_price,
+        _submission_slots(request.app),
+        session_scope,
+        client_factory,
+        event.id,
+        sku.id,
         marketplace.amazon_id,
         sku.sku,
-        float(payload.price),
-        float(payload.business_price) if payload.business_price is not None else None,
-    )
-    sku.last_updated_price = payload.price
-    sku.last_updated_business_price = payload.business_price
-    sku.last_price_update = datetime.utcnow()
-    session.add(
-        PriceEvent(
-            sku_id=sku.id,
-            created_at=datetime.utcnow(),
-            old_price=old_price,
-            new_price=payload.price,
-            old_business_price=old_business,
-            new_business_price=payload.business_price,
-            reason="manual",
-            context={"source": "manual"},
-        )
+        payload.price,
+        payload.business_price,
+        now,
     )
-    await session.commit()
+    invalidate_dashboard(request.app)
     return payload
 
 
+async def _submit_manual_price(
+    slots: asyncio.Semaphore,
+    session_scope: Callable[[], AbstractAsyncContextManager[AsyncSession]],
+    client_factory: Callable[[], Awaitable[SPAPIClient]],
+    event_id: int,
+    sku_id: int,
+    marketplace_id: str,
+    sku: str,
+    price: Decimal,
+    business_price: Decimal | None,
+    requested_at: datetime,
+) -> None:
+    async with slots:
+        client = await client_factory()
+        try:
+            await client.submit_price_update(
+                marketplace_id,
+                sku,
+                float(price),
+                float(business_price) if business_price is not None else None,
+            )
+            status = "submitted"
+        except Exception:
+            logger.exception("Manual price submission failed for %s (%s)", sku, marketplace_id)
+            status = "failed"
+        finally:
+            await client.close()
+    async with session_scope() as session:
+        event = await session.get(PriceEvent, event_id)
+        if event is not None:
+            event.context = {**(event.context or {}), "status": status}
+        if status == "submitted":
+            record = await session.get(Sku, sku_id)
+            if record is not None:
+                record.last_updated_price = price
+                record.last_updated_business_price = business_price
+                record.last_price_update = requested_at
+        await session.commit()
+
+
+@router.post("/manual-price/batch", response_model=ManualPriceBatchResult)
+async def manual_price_update_batch(
+    request: Request,
+    payloads: list[ManualPriceUpdate],
+    session: AsyncSession = Depends(get_db),
+    client: SPAPIClient = Depends(get_sp_api_client),
+    now: datetime = Depends(utc_now),
+) -> ManualPriceBatchResult:
+    if not payloads:
+        raise HTTPException(status_code=400, detail="No price updates provided")
+    pairs = {(item.sku, item.marketplace_code) for item in payloads}
+    rows = (
+        await session.execute(
+            select(Sku, Marketplace)
+            .join(Marketplace, Sku.marketplace_id == Marketplace.id)
+            .where(tuple_(Sku.sku, Marketplace.code).in_(pairs))
+        )
+    ).all()
+    found = {(sku.sku, marketplace.code): (sku, marketplace) for sku, marketplace in rows}
+    missing = [f"{sku}:{code}" for sku, code in pairs if (sku, code) not in found]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"SKUs not found: {', '.join(sorted(missing))}",
+        )
+
+    semaphore = asyncio.Semaphore(max(1, settings.repricing_concurrency))
+
+    async def submit(item: ManualPriceUpdate) -> None:
+        sku, marketplace = found[(item.sku, item.marketplace_code)]
+        async with semaphore:
+            await client.submit_price_update(
+                marketplace.amazon_id,
+                sku.sku,
+                float(item.price),
+                float(item.business_price) if item.business_price is not None else None,
+            )
+
+    # One rejected submission must not discard the others: every outcome is collected,
+    # the accepted prices are stored and the rejected ones reported back.
+    results = await asyncio.gather(*(submit(item) for item in payloads), return_exceptions=True)
+    updated: list[ManualPriceUpdate] = []
+    failed: list[ManualPriceFailure] = []
+    events = []
+    for item, result in zip(payloads, results, strict=True):
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            logger.error(
+                "Manual price submission failed for %s (%s): %s",
+                item.sku,
+                item.marketplace_code,
+                result,
+            )
+            failed.append(
+                ManualPriceFailure(
+                    marketplace_code=item.marketplace_code, sku=item.sku, error=str(result)
+                )
+            )
+            continue
+        updated.append(item)
+        sku, _ = found[(item.sku, item.marketplace_code)]
+        events.append(
+            {
+                "sku_id": sku.id,
+                "created_at": now,
+                "old_price": sku.last_updated_price,
+                "new_price": item.price,
+                "old_business_price": sku.last_updated_business_price,
+                "new_business_price": item.business_price,
+                "reason": "manual",
+                "context": {"source": "manual"},
+            }
+        )
+        sku.last_updated_price = item.price
+        sku.last_updated_business_price = item.business_price
+        sku.last_price_update = now
+    if events:
+        await session.execute(insert(PriceEvent), events)
+        await session.commit()
+        invalidate_dashboard(request.app)
+    return ManualPriceBatchResult(updated=updated, failed=failed)
+
+
 @router.post("/bulk-upload", response_model=BulkFeedUploadResponse)
 async def bulk_upload(
     marketplace_code: str,
     file: UploadFile,
     client: SPAPIClient = Depends(get_sp_api_client),
+    now: datetime = Depends(utc_now),
 ) -> BulkFeedUploadResponse:
-    content = await file.read()
-    response = await client.submit_bulk_feed(content, file.content_type or "text/csv")
+    # The upload is already spooled by Starlette; its file is handed over as is.
+    response = await client.submit_bulk_feed(file.file, file.content_type or "text/csv")
     return BulkFeedUploadResponse(
         feed_id=response.get("feedDocumentId", "unknown"),
-        submitted_at=datetime.utcnow(),
+        submitted_at=now,
         status=response.get("status", "SUBMITTED"),
     )
@@ -2,149 +2,222 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
 from datetime import datetime
+from decimal import Decimal
+from typing import Any
 
-from fastapi import APIRouter, Depends, Request
+import orjson
+from fastapi import APIRouter, Depends, FastAPI, Request, Response
 from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.config import settings
-from ..dependencies import get_db
-from ..models import Alert, Marketplace, PriceEvent, Sku, SystemSetting
-from ..schemas import (
-    AlertPayload,
-    DashboardPayload,
-    MarketplaceMetrics,
-    RepricerSettings,
-    SimulatedPriceOutcome,
-    SystemHealth,
-)
+from ..dependencies import get_db_factory, utc_now
+from ..models import Alert, Marketplace, PriceEvent, Sku
+from ..schemas import DashboardPayload
+from ..services.settings_cache import cached_settings, get_settings_map
 
 router = APIRouter()
 
+# Built once at import so every poll reuses the same statement objects (and their
+# cached compiled SQL).
+_METRICS_STMT = (
+    select(
+        Marketplace.code,
+        Marketplace.name,
+        func.count(Sku.id).label("total"),
+        func.coalesce(
+            func.sum(case((Sku.hold_buy_box.is_(True), 1), else_=0)),
+            0,
+        ).label("buy_box"),
+    )
+    .select_from(Marketplace)
+    .outerjoin(Sku, Sku.marketplace_id == Marketplace.id)
+    .group_by(Marketplace.id, Marketplace.code, Marketplace.name)
+    .order_by(Marketplace.id)
+)
+# Column-level select: the rows go straight into AlertPayload, so there is no point
+# hydrating ORM instances into the identity map.
+_ALERTS_STMT = (
+    select(
+        Alert.id,
+        Alert.message,
+        Alert.severity,
+        Alert.created_at,
+        Alert.acknowledged,
+        Alert.metadata_payload,
+    )
+    .order_by(Alert.created_at.desc())
+    .limit(20)
+)
+_SIMULATED_STMT = (
+    select(PriceEvent, Sku, Marketplace)
+    .join(Sku, PriceEvent.sku_id == Sku.id)
+    .join(Marketplace, Sku.marketplace_id == Marketplace.id)
+    .where(PriceEvent.reason == "repricer-test")
+    .order_by(PriceEvent.created_at.desc())
+    .limit(20)
+)
+
+
+_JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _json_default(value: object) -> str:
+    # Same wire format pydantic uses for Decimal fields.
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Unsupported dashboard value: {type(value).__name__}")
+
+
+def invalidate_dashboard(app: FastAPI) -> None:
+    """Force the next dashboard request to rebuild its payload."""
+
+    app.state.dashboard_version = getattr(app.state, "dashboard_version", 0) + 1
+
+
+def _cache_key(request: Request) -> tuple[int, int]:
+    scheduler = getattr(request.app.state, "scheduler", None)
+    return (
+        getattr(scheduler, "tick_id", 0),
+        getattr(request.app.state, "dashboard_version", 0),
+    )
+
 
 @router.get("/dashboard", response_model=DashboardPayload)
 async def get_dashboard(
     request: Request,
-    session: AsyncSession = Depends(get_db),
-) -> DashboardPayload:
-    marketplaces = (await session.scalars(select(Marketplace))).all()
-    sku_stats = await session.execute(
-        select(
-            Sku.marketplace_id,
-            func.count(Sku.id).label("total"),
-            func.coalesce(
-                func.sum(case((Sku.hold_buy_box.is_(True), 1), else_=0)),
-                0,
-            ).label("buy_box"),
-        ).group_by(Sku.marketplace_id)
+    session_scope: Callable[[], AbstractAsyncContextManager[AsyncSession]] = Depends(
+        get_db_factory
+    ),
+    now: datetime = Depends(utc_now),
+) -> Response:
+    # Underlying data only moves on scheduler ticks or manual actions, so browser polls
+    # in between are served the already-serialized payload.
+    key = _cache_key(request)
+    cached = getattr(request.app.state, "dashboard_cache", None)
+    if cached is not None:
+        cached_key, expires_at, body = cached
+        if cached_key == key and time.monotonic() < expires_at:
+            return Response(content=body, media_type="application/json")
+    payload = await _build_dashboard(request, session_scope, now)
+    body = orjson.dumps(payload, default=_json_default, option=_JSON_OPTIONS)
+    request.app.state.dashboard_cache = (
+        key,
+        time.monotonic() + settings.scheduler_tick_seconds,
+        body,
     )
-    stats_map = {row.marketplace_id: row for row in sku_stats}
-    metrics: list[MarketplaceMetrics] = []
-    for marketplace in marketplaces:
-        stat = stats_map.get(marketplace.id)
-        total = stat.total if stat else 0
-        buy_box = stat.buy_box if stat else 0
-        percentage = float(buy_box) / total * 100 if total else 0.0
-        metrics.append(
-            MarketplaceMetrics(
-                code=marketplace.code,
-                name=marketplace.name,
-                buy_box_skus=int(buy_box),
-                total_skus=int(total),
-                buy_box_percentage=percentage,
-            )
-        )
-    alerts_rows = (
-        await session.execute(
-            select(Alert).order_by(Alert.created_at.desc()).limit(20)
-        )
-    ).scalars()
+    return Response(content=body, media_type="application/json")
+
+
+async def _build_dashboard(
+    request: Request,
+    session_scope: Callable[[], AbstractAsyncContextManager[AsyncSession]],
+    now: datetime,
+) -> dict[str, Any]:
+    """Assemble the ``DashboardPayload`` shape as plain data.
+
+    Every value comes from our own tables and settings, so it is serialized directly
+    rather than being validated through the pydantic models first.
+    """
+
+    # Each query runs on its own short-lived session (AsyncSession is not safe for
+    # concurrent use), so the round-trips overlap instead of adding up.
+    async def run_metrics() -> list[Any]:
+        async with session_scope() as session:
+            return (await session.execute(_METRICS_STMT)).all()
+
+    async def run_alerts() -> list[Any]:
+        async with session_scope() as session:
+            return (await session.execute(_ALERTS_STMT)).all()
+
+    async def run_settings() -> dict[str, str]:
+        cached = cached_settings(request.app)
+        if cached is not None:
+            return cached
+        async with session_scope() as session:
+            return await get_settings_map(request.app, session)
+
+    async def run_simulated() -> list[Any]:
+        async with session_scope() as session:
+            return (await session.execute(_SIMULATED_STMT)).all()
+
+    metric_rows, alerts_rows, settings_map, simulated_rows = await asyncio.gather(
+        run_metrics(), run_alerts(), run_settings(), run_simulated()
+    )
+    metrics = [
+        {
+            "code": code,
+            "name": name,
+            "buy_box_skus": int(buy_box),
+            "total_skus": int(total),
+            "buy_box_percentage": float(buy_box) / total * 100 if total else 0.0,
+        }
+        for code, name, total, buy_box in metric_rows
+    ]
     alerts = [
-        AlertPayload(
-            id=alert.id,
-            message=alert.message,
-            severity=alert.severity,
-            created_at=alert.created_at,
-            acknowledged=alert.acknowledged,
-            metadata=alert.metadata_payload,
-        )
+        {
+            "id": alert.id,
+            "message": alert.message,
+            "severity": alert.severity,
+            "created_at": alert.created_at,
+            "acknowledged": alert.acknowledged,
+            "metadata": alert.metadata_payload,
+        }
         for alert in alerts_rows
     ]
-    settings_rows = (
-        await session.execute(
-            select(SystemSetting).where(
-                SystemSetting.key.in_(
-                    {
-                        "max_price_change_percent",
-                        "step_up_type",
-                        "step_up_value",
-                        "step_up_interval_hours",
-                        "step_up_percentage",
-                        "test_mode",
-                    }
-                )
-            )
-        )
-    ).scalars().all()
-    settings_map = {row.key: row.value for row in settings_rows}
-    repricer_settings = RepricerSettings(
-        max_price_change_percent=float(
+    repricer_settings = {
+        "max_price_change_percent": float(
             settings_map.get("max_price_change_percent", settings.max_price_change_percent)
         ),
-        step_up_type=str(
+        "step_up_type": str(
             settings_map.get("step_up_type", settings.step_up_type)
             or settings.step_up_type
         ).lower(),
-        step_up_value=float(
+        "step_up_value": float(
             settings_map.get(
                 "step_up_value",
                 settings_map.get("step_up_percentage", settings.step_up_value),
             )
         ),
-        step_up_interval_hours=float(
+        "step_up_interval_hours": float(
             settings_map.get("step_up_interval_hours", settings.step_up_interval_hours)
         ),
-        test_mode=(
+        "test_mode": (
             settings.test_mode
             if "test_mode" not in settings_map
             else str(settings_map["test_mode"]).lower() in {"1", "true", "yes", "on"}
         ),
-    )
-    simulated_rows = await session.execute(
-        select(PriceEvent, Sku, Marketplace)
-            .join(Sku, PriceEvent.sku_id == Sku.id)
-            .join(Marketplace, Sku.marketplace_id == Marketplace.id)
-            .where(PriceEvent.reason == "repricer-test")
-            .order_by(PriceEvent.created_at.desc())
-            .limit(20)
-    )
+    }
 
     simulated_events = [
-        SimulatedPriceOutcome(
-            sku=sku.sku,
-            marketplace_code=marketplace.code,
-            created_at=event.created_at,
-            old_price=event.old_price,
-            new_price=event.new_price,
-            old_business_price=event.old_business_price,
-            new_business_price=event.new_business_price,
-            context=event.context,
-        )
-        for event, sku, marketplace in simulated_rows.all()
+        {
+            "sku": sku.sku,
+            "marketplace_code": marketplace.code,
+            "created_at": event.created_at,
+            "old_price": event.old_price,
+            "new_price": event.new_price,
+            "old_business_price": event.old_business_price,
+            "new_business_price": event.new_business_price,
+            "context": event.context,
+        }
+        for event, sku, marketplace in simulated_rows
     ]
     scheduler = getattr(request.app.state, "scheduler", None)
     health_details = {}
     if scheduler:
         health_details = {
             "last_runs": {k: v.isoformat() for k, v in scheduler.last_runs.items()},
-            "stats": {k: v for k, v in scheduler.stats.items()},
+            "stats": dict(scheduler.stats),
         }
-    health = SystemHealth(status="ok", timestamp=datetime.utcnow(), details=health_details)
-    return DashboardPayload(
-        metrics=metrics,
-        health=health,
-        alerts=alerts,
-        settings=repricer_settings,
-        simulated_events=simulated_events,
-    )
+    return {
+        "metrics": metrics,
+        "health": {"status": "ok", "timestamp": now, "details": health_details},
+        "alerts": alerts,
+        "settings": repricer_settings,
+        "simulated_events": simulated_events,
+    }
@@ -3,15 +3,19 @@
 from __future__ import annotations
 
 from decimal import Decimal
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request
 from sqlalchemy import func, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from ..dependencies import get_db
 from ..migrations.profile_defaults import DEFAULT_PROFILE_NAME
 from ..models import Marketplace, RepricingProfile, Sku
 from ..schemas import (
+    AggressivenessSettings,
+    MarginPolicy,
     ProfileAssignmentRequest,
     ProfileSkuSummary,
     RepricingProfileCreate,
@@ -22,20 +26,42 @@ from ..schemas import (
 
 router = APIRouter(prefix="/profiles", tags=["profiles"])
 
+_SKU_COUNT = (
+    select(func.count())
+    .where(Sku.profile_id == RepricingProfile.id)
+    .correlate(RepricingProfile)
+    .scalar_subquery()
+)
+_LIST_PROFILES_STMT = select(RepricingProfile, _SKU_COUNT.label("sku_count")).order_by(
+    RepricingProfile.name
+)
+
+
+def _invalidate_schedule(app: FastAPI) -> None:
+    # Frequencies and SKU assignments decide which runs the scheduler dispatches.
+    scheduler = getattr(app.state, "scheduler", None)
+    if scheduler is not None:
+        scheduler.invalidate_schedule()
+
+
+def _profile_fields(profile: RepricingProfile, sku_count: int) -> dict[str, Any]:
+    return {
+        "id": profile.id,
+        "name": profile.name,
+        "frequency_minutes": profile.frequency_minutes,
+        "aggressiveness": AggressivenessSettings.model_construct(**(profile.aggressiveness or {})),
+        "price_change_limit_percent": float(profile.price_change_limit_percent),
+        "margin_policy": MarginPolicy.model_construct(**(profile.margin_policy or {})),
+        "step_up_percentage": float(profile.step_up_percentage),
+        "step_up_interval_hours": profile.step_up_interval_hours,
+        "sku_count": sku_count,
+        "created_at": profile.created_at,
+    }
+
 
 def _to_schema(profile: RepricingProfile, sku_count: int) -> RepricingProfileOut:
-    return RepricingProfileOut(
-        id=profile.id,
-        name=profile.name,
-        frequency_minutes=profile.frequency_minutes,
-        aggressiveness=profile.aggressiveness,
-        price_change_limit_percent=float(profile.price_change_limit_percent),
-        margin_policy=profile.margin_policy,
-        step_up_percentage=float(profile.step_up_percentage),
-        step_up_interval_hours=profile.step_up_interval_hours,
-        sku_count=sku_count,
-        created_at=profile.created_at,
-    )
+    # Rows were validated on the way in, so responses are assembled without re-validation.
+    return RepricingProfileOut.model_construct(**_profile_fields(profile, sku_count))
 
 
 async def _get_profile(session: AsyncSession, profile_id: int) -> RepricingProfile:
@@ -55,10 +81,10 @@ async def _profile_detail(session: AsyncSession, profile: RepricingProfile) -> R
         )
     ).all()
     sku_count = len(sku_rows)
-    return RepricingProfileDetail(
-        **_to_schema(profile, sku_count).model_dump(),
+    return RepricingProfileDetail.model_construct(
+        **_profile_fields(profile, sku_count),
         skus=[
-            ProfileSkuSummary(
+            ProfileSkuSummary.model_construct(
                 id=sku.id,
                 sku=sku.sku,
                 asin=sku.asin,
@@ -71,19 +97,13 @@ async def _profile_detail(session: AsyncSession, profile: RepricingProfile) -> R
 
 @router.get("/", response_model=list[RepricingProfileOut])
 async def list_profiles(session: AsyncSession = Depends(get_db)) -> list[RepricingProfileOut]:
-    rows = (
-        await session.execute(
-            select(RepricingProfile, func.count(Sku.id))
-            .outerjoin(Sku)
-            .group_by(RepricingProfile.id)
-            .order_by(RepricingProfile.name)
-        )
-    ).all()
+    rows = (await session.execute(_LIST_PROFILES_STMT)).all()
     return [_to_schema(profile, int(count)) for profile, count in rows]
 
 
 @router.post("/", response_model=RepricingProfileOut, status_code=201)
 async def create_profile(
+    request: Request,
     payload: RepricingProfileCreate,
     session: AsyncSession = Depends(get_db),
 ) -> RepricingProfileOut:
@@ -103,7 +123,7 @@ async def create_profile(
     )
     session.add(profile)
     await session.commit()
-    await session.refresh(profile)
+    _invalidate_schedule(request.app)
     return _to_schema(profile, 0)
 
 
@@ -118,6 +138,7 @@ async def get_profile(
 
 @router.put("/{profile_id}", response_model=RepricingProfileOut)
 async def update_profile(
+    request: Request,
     profile_id: int,
     payload: RepricingProfileUpdate,
     session: AsyncSession = Depends(get_db),
@@ -145,13 +166,15 @@ async def update_profile(
     if payload.step_up_interval_hours is not None:
         profile.step_up_interval_hours = payload.step_up_interval_hours
     await session.commit()
-    await session.refresh(profile)
+    if payload.frequency_minutes is not None:
+        _invalidate_schedule(request.app)
     sku_count = await session.scalar(select(func.count()).where(Sku.profile_id == profile.id))
     return _to_schema(profile, int(sku_count or 0))
 
 
 @router.delete("/{profile_id}")
 async def delete_profile(
+    request: Request,
     profile_id: int,
     session: AsyncSession = Depends(get_db),
 ) -> dict[str, str]:
@@ -163,11 +186,13 @@ async def delete_profile(
         raise HTTPException(status_code=400, detail="Profile has assigned SKUs")
     await session.delete(profile)
     await session.commit()
+    _invalidate_schedule(request.app)
     return {"status": "deleted"}
 
 
 @router.post("/{profile_id}/assign", response_model=RepricingProfileDetail)
 async def assign_skus(
+    request: Request,
     profile_id: int,
     payload: ProfileAssignmentRequest,
     session: AsyncSession = Depends(get_db),
@@ -176,23 +201,37 @@ async def assign_skus(
     if not payload.assignments:
         raise HTTPException(status_code=400, detail="No assignments provided")
     pairs = {(item.sku, item.marketplace_code) for item in payload.assignments}
+    # Validate and assign in one statement: the RETURNING rows tell us which pairs
+    # matched, so no separate existence SELECT is needed. The marketplace code is
+    # returned through a subquery because SQLite's RETURNING may not reference FROM
+    # tables.
+    code_source = aliased(Marketplace)
+    marketplace_code = (
+        select(code_source.code)
+        .where(code_source.id == Sku.marketplace_id)
+        .correlate(Sku)
+        .scalar_subquery()
+    )
     rows = (
         await session.execute(
-            select(Sku.id, Sku.sku, Marketplace.code)
-            .join(Marketplace)
-            .where(tuple_(Sku.sku, Marketplace.code).in_(pairs))
+            update(Sku)
+            .where(
+                Sku.marketplace_id == Marketplace.id,
+                tuple_(Sku.sku, Marketplace.code).in_(pairs),
+            )
+            .values(profile_id=profile.id)
+            .returning(Sku.sku, marketplace_code)
+            .execution_options(synchronize_session=False)
         )
     ).all()
-    found = {(sku, code): sku_id for sku_id, sku, code in rows}
+    found = {(sku, code) for sku, code in rows}
     missing = [f"{sku}:{code}" for sku, code in pairs if (sku, code) not in found]
     if missing:
+        await session.rollback()
         raise HTTPException(
             status_code=404,
             detail=f"SKUs not found: {', '.join(sorted(missing))}",
         )
-    await session.execute(
-        update(Sku).where(Sku.id.in_(found.values())).values(profile_id=profile.id)
-    )
     await session.commit()
-    await session.refresh(profile)
+    _invalidate_schedule(request.app)
     return await _profile_detail(session, profile)
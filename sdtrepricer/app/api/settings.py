@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.config import settings
 from ..dependencies import get_db
 from ..models import SystemSetting
 from ..schemas import RepricerSettings
+from ..services.settings_cache import cached_settings, get_settings_map, replace_settings_cache
+from .dashboard import invalidate_dashboard
 
 router = APIRouter()
 
@@ -22,11 +24,14 @@ SETTING_KEYS = {
     "test_mode": "test_mode",
 }
 
+_SETTING_BY_KEY_STMT = select(SystemSetting).where(SystemSetting.key == bindparam("key"))
+
 
 @router.get("/settings", response_model=RepricerSettings)
-async def read_settings(session: AsyncSession = Depends(get_db)) -> RepricerSettings:
-    settings_rows = (await session.execute(select(SystemSetting))).scalars().all()
-    mapping = {setting.key: setting.value for setting in settings_rows}
+async def read_settings(
+    request: Request, session: AsyncSession = Depends(get_db)
+) -> RepricerSettings:
+    mapping = await get_settings_map(request.app, session)
     try:
         test_mode_value = mapping.get("test_mode")
         return RepricerSettings(
@@ -59,13 +64,15 @@ async def read_settings(session: AsyncSession = Depends(get_db)) -> RepricerSett
 
 @router.post("/settings", response_model=RepricerSettings)
 async def update_settings(
+    request: Request,
     payload: RepricerSettings,
     session: AsyncSession = Depends(get_db),
 ) -> RepricerSettings:
+    written: dict[str, str] = {}
     for key, value in payload.model_dump().items():
         if key not in SETTING_KEYS:
             continue
-        existing = await session.scalar(select(SystemSetting).where(SystemSetting.key == key))
+        existing = await session.scalar(_SETTING_BY_KEY_STMT, {"key": key})
         if isinstance(value, bool):
             stored_value = "true" if value else "false"
         else:
@@ -74,5 +81,10 @@ async def update_settings(
             existing.value = stored_value
         else:
             session.add(SystemSetting(key=key, value=stored_value))
+        written[key] = stored_value
     await session.commit()
+    current = cached_settings(request.app)
+    if current is not None:
+        replace_settings_cache(request.app, current | written)
+    invalidate_dashboard(request.app)
     return payload
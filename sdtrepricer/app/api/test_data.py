@@ -17,9 +17,8 @@ async def upload_floor_dataset(
     file: UploadFile,
     session: AsyncSession = Depends(get_db),
 ) -> dict[str, int]:
-    content = await file.read()
     try:
-        count = await ingest_floor_data(session, marketplace_code, content)
+        count = await ingest_floor_data(session, marketplace_code, file)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     return {"records": count}
@@ -31,9 +30,8 @@ async def upload_competitor_dataset(
     file: UploadFile,
     session: AsyncSession = Depends(get_db),
 ) -> dict[str, int]:
-    content = await file.read()
     try:
-        count = await ingest_competitor_data(session, marketplace_code, content)
+        count = await ingest_competitor_data(session, marketplace_code, file)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     return {"records": count}
@@ -2,16 +2,86 @@
 
 from __future__ import annotations
 
-from contextlib import asynccontextmanager
+import asyncio
+from functools import cache
+from typing import Any
+from uuid import uuid4
 
-from sqlalchemy import inspect, text
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+import orjson
+from sqlalchemy import (
+    BigInteger,
+    bindparam,
+    cast,
+    column,
+    event,
+    func,
+    select,
+    table,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy.schema import CreateIndex
 
+from ..models import Base, SystemSetting
 from .config import settings
-from ..models import Base
+
+# Bump whenever models or the startup DDL below change so existing databases re-run it.
+SCHEMA_VERSION = "7"
+SCHEMA_VERSION_KEY = "schema_version"
 
 _engine: AsyncEngine | None = None
-_session_factory: async_sessionmaker[AsyncSession] | None = None
+_profile_migration_applied = False
+
+
+def _json_dumps(value: object) -> str:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _mark_disconnects(context) -> None:
+    # Without pre-ping a server-side close only surfaces on the next statement. Treat
+    # socket-level failures as disconnects so the pool drops the stale connections
+    # and the next checkout reconnects.
+    if isinstance(context.original_exception, (ConnectionError, OSError)):
+        context.is_disconnect = True
+
+
+def _engine_options() -> dict[str, Any]:
+    """Return the pool and driver arguments for :func:`get_engine`."""
+
+    if settings.database_url.startswith("postgresql+asyncpg") and settings.db_pgbouncer:
+        # PgBouncer transaction pooling hands each transaction to any server connection,
+        # so asyncpg must not rely on named statements it prepared on another one:
+        # caches stay off (unless PgBouncer tracks them via max_prepared_statements)
+        # and every statement gets a unique name. PgBouncer already pools, so
+        # connections are not held here either.
+        return {
+            "connect_args": {
+                "statement_cache_size": settings.db_statement_cache_size,
+                "prepared_statement_cache_size": settings.db_statement_cache_size,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+            "poolclass": NullPool,
+        }
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        # PgBouncer already health-checks its server connections; a pre-ping here only
+        # adds a round trip per checkout. Idle connections are recycled instead.
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
 
 
 def get_engine() -> AsyncEngine:
@@ -19,56 +89,242 @@ def get_engine() -> AsyncEngine:
 
     global _engine
     if _engine is None:
-        _engine = create_async_engine(settings.database_url, echo=False, pool_pre_ping=True)
+        _engine = create_async_engine(
+            settings.database_url,
+            echo=False,
+            # JSON columns (profile aggressiveness/margin policy, event context, alert
+            # metadata) encode and decode through orjson instead of the stdlib.
+            json_serializer=_json_dumps,
+            json_deserializer=orjson.loads,
+            **_engine_options(),
+        )
+        event.listen(_engine.sync_engine, "handle_error", _mark_disconnects)
     return _engine
 
 
+@cache
 def get_session_factory() -> async_sessionmaker[AsyncSession]:
-    """Return the session factory, creating if required."""
+    """Return the process-wide session factory."""
+
+    # autoflush is off: handlers commit explicitly, so flushing before every SELECT
+    # only adds round trips.
+    return async_sessionmaker(bind=get_engine(), expire_on_commit=False, autoflush=False)
 
-    global _session_factory
-    if _session_factory is None:
-        _session_factory = async_sessionmaker(bind=get_engine(), expire_on_commit=False)
-    return _session_factory
 
+def get_session() -> AsyncSession:
+    """Return a new async session; use it as ``async with get_session() as session``."""
 
-@asynccontextmanager
-async def get_session() -> AsyncSession:
-    """Yield an async database session."""
+    return get_session_factory()()
 
-    session_factory = get_session_factory()
-    async with session_factory() as session:  # type: ignore[call-arg]
-        yield session
+
+async def warm_pool() -> None:
+    """Pre-establish ``db_pool_size`` connections so early requests skip the handshake."""
+
+    engine = get_engine()
+
+    async def _ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(_ping() for _ in range(settings.db_pool_size)))
 
 
 async def init_db() -> None:
-    """Create database schema if it does not exist."""
+    """Create database schema if it does not exist.
+
+    Skipped entirely once ``system_settings`` records the current ``SCHEMA_VERSION``,
+    so only the first worker to boot pays for ``create_all`` and the column lookups.
+    """
 
     engine = get_engine()
+    if await _stored_schema_version(engine) == SCHEMA_VERSION:
+        return
     async with engine.begin() as conn:  # type: ignore[arg-type]
         await conn.run_sync(Base.metadata.create_all)
         await conn.run_sync(_apply_repricing_profile_migration)
+        await conn.run_sync(_apply_price_cents_migration)
+    # CREATE INDEX CONCURRENTLY refuses to run inside a transaction block.
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.run_sync(_create_retrofitted_indexes)
+    async with engine.begin() as conn:
+        insert = sqlite_insert if conn.dialect.name == "sqlite" else pg_insert
+        stmt = insert(SystemSetting).values(key=SCHEMA_VERSION_KEY, value=SCHEMA_VERSION)
+        await conn.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["key"], set_={"value": stmt.excluded.value}
+            )
+        )
 
 
-def _apply_repricing_profile_migration(connection) -> None:
-    """Backfill ``repricing_profile_id`` column for pre-existing ``skus`` tables."""
+async def _stored_schema_version(engine: AsyncEngine) -> str | None:
+    try:
+        async with engine.connect() as conn:
+            return await conn.scalar(
+                select(SystemSetting.value).where(SystemSetting.key == SCHEMA_VERSION_KEY)
+            )
+    except DBAPIError:
+        # Fresh database: system_settings does not exist yet.
+        return None
+
+
+# Indexes declared on tables that already existed when they were added. create_all
+# only builds indexes together with a new table, so existing databases get these
+# through explicit DDL.
+_RETROFITTED_INDEXES = (
+    "sku_mp_bb_idx",
+    "ix_skus_profile_marketplace",
+    "ix_skus_marketplace_sku",
+    "ix_price_events_sku_created",
+    "alert_created_desc_idx",
+)
+
+
+def _retrofitted_index_ddl(dialect) -> list[str]:
+    indexes = {
+        index.name: index
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+    }
+    statements = []
+    for name in _RETROFITTED_INDEXES:
+        ddl = str(CreateIndex(indexes[name], if_not_exists=True).compile(dialect=dialect))
+        if dialect.name == "postgresql":
+            # Built without blocking writes to a live table.
+            ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+        statements.append(ddl)
+    return statements
 
-    inspector = inspect(connection)
-    columns = {column["name"] for column in inspector.get_columns("skus")}
-    if "repricing_profile_id" in columns:
-        return
 
-    connection.execute(text("ALTER TABLE skus ADD COLUMN repricing_profile_id INTEGER"))
+def _create_retrofitted_indexes(connection) -> None:
+    """Create any of ``_RETROFITTED_INDEXES`` the database is still missing."""
+
+    for ddl in _retrofitted_index_ddl(connection.dialect):
+        connection.exec_driver_sql(ddl)
+
+
+def _existing_columns(connection, table: str, names: tuple[str, ...]) -> set[str]:
+    """Return which of ``names`` exist on ``table``.
+
+    A single catalog lookup instead of ``inspect().get_columns``, which reflects types,
+    defaults and nullability for every column. ``create_all`` runs first, so the table
+    itself always exists here.
+    """
 
     if connection.dialect.name == "sqlite":
-        # SQLite cannot add foreign key constraints via ALTER TABLE; rely on
-        # application-level integrity for in-memory fixtures.
-        return
+        rows = connection.execute(text(f"PRAGMA table_info({table})"))
+        return {row[1] for row in rows} & set(names)
+    rows = connection.execute(
+        text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table "
+            "AND column_name IN :names"
+        ).bindparams(bindparam("names", expanding=True)),
+        {"table": table, "names": list(names)},
+    )
+    return set(rows.scalars())
 
-    connection.execute(
+
+# Built once per process and selected by dialect at run time.
+_PROFILE_COLUMN_DDL = {
+    # SQLite cannot add foreign key constraints via ALTER TABLE; rely on
+    # application-level integrity for in-memory fixtures.
+    "sqlite": (text("ALTER TABLE skus ADD COLUMN profile_id INTEGER"),),
+    # One statement so the ACCESS EXCLUSIVE lock on skus is taken once.
+    "postgresql": (
         text(
-            "ALTER TABLE skus ADD CONSTRAINT fk_skus_repricing_profile_id "
-            "FOREIGN KEY (repricing_profile_id) REFERENCES repricing_profiles(id) "
+            "ALTER TABLE skus ADD COLUMN profile_id INTEGER, "
+            "ADD CONSTRAINT fk_skus_profile_id "
+            "FOREIGN KEY (profile_id) REFERENCES repricing_profiles(id) "
             "ON DELETE SET NULL"
+        ),
+    ),
+}
+# Earlier schema revisions stored the assignment in a second, redundant column.
+_LEGACY_PROFILE_BACKFILL = text(
+    "UPDATE skus SET profile_id = repricing_profile_id "
+    "WHERE profile_id IS NULL AND repricing_profile_id IS NOT NULL"
+)
+
+
+def _apply_repricing_profile_migration(connection) -> None:
+    """Backfill the ``profile_id`` column for ``skus`` tables that predate profiles."""
+
+    global _profile_migration_applied
+    if _profile_migration_applied:
+        return
+
+    columns = _existing_columns(connection, "skus", ("profile_id", "repricing_profile_id"))
+    if "profile_id" not in columns:
+        for statement in _PROFILE_COLUMN_DDL.get(
+            connection.dialect.name, _PROFILE_COLUMN_DDL["postgresql"]
+        ):
+            connection.execute(statement)
+    if "repricing_profile_id" in columns:
+        connection.execute(_LEGACY_PROFILE_BACKFILL)
+    _profile_migration_applied = True
+
+
+_PRICE_CENTS_COLUMNS = {
+    "min_price": "min_price_cents",
+    "min_business_price": "min_business_price_cents",
+    "last_updated_price": "last_updated_price_cents",
+    "last_updated_business_price": "last_updated_business_price_cents",
+}
+# Statements are fixed per whitelisted column; nothing is interpolated at run time.
+# One ADD COLUMN per statement, as SQLite requires; on PostgreSQL the first one takes
+# the table lock and the migration transaction holds it for the rest.
+_PRICE_CENTS_ADD_COLUMN = {
+    "min_price_cents": text('ALTER TABLE skus ADD COLUMN "min_price_cents" BIGINT'),
+    "min_business_price_cents": text(
+        'ALTER TABLE skus ADD COLUMN "min_business_price_cents" BIGINT'
+    ),
+    "last_updated_price_cents": text(
+        'ALTER TABLE skus ADD COLUMN "last_updated_price_cents" BIGINT'
+    ),
+    "last_updated_business_price_cents": text(
+        'ALTER TABLE skus ADD COLUMN "last_updated_business_price_cents" BIGINT'
+    ),
+}
+# Lightweight table clause over both generations of price columns, so the backfill is
+# compiled with dialect-quoted identifiers instead of assembled as a string.
+_LEGACY_SKU_PRICES = table(
+    "skus", *(column(name) for name in (*_PRICE_CENTS_COLUMNS, *_PRICE_CENTS_COLUMNS.values()))
+)
+# The ORM no longer writes the legacy min_price, so its NOT NULL must go. SQLite cannot
+# alter a column's nullability; once copied, the column is dropped there instead.
+_LEGACY_MIN_PRICE_DDL = {
+    "sqlite": text('ALTER TABLE skus DROP COLUMN "min_price"'),
+    "postgresql": text('ALTER TABLE skus ALTER COLUMN "min_price" DROP NOT NULL'),
+}
+
+
+def _apply_price_cents_migration(connection) -> None:
+    """Copy legacy ``Numeric`` SKU prices into their integer-cents columns."""
+
+    columns = _existing_columns(
+        connection, "skus", (*_PRICE_CENTS_COLUMNS, *_PRICE_CENTS_COLUMNS.values())
+    )
+    for cents, statement in _PRICE_CENTS_ADD_COLUMN.items():
+        if cents not in columns:
+            connection.execute(statement)
+    legacy = {name: cents for name, cents in _PRICE_CENTS_COLUMNS.items() if name in columns}
+    if not legacy:
+        return
+    prices = _LEGACY_SKU_PRICES.c
+    connection.execute(
+        update(_LEGACY_SKU_PRICES).values(
+            {
+                cents: func.coalesce(
+                    prices[cents], cast(func.round(prices[name] * 100), BigInteger)
+                )
+                for name, cents in legacy.items()
+            }
         )
     )
+    if "min_price" in legacy:
+        connection.execute(
+            _LEGACY_MIN_PRICE_DDL.get(
+                connection.dialect.name, _LEGACY_MIN_PRICE_DDL["postgresql"]
+            )
+        )
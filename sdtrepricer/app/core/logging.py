@@ -2,34 +2,50 @@
 
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
 from logging.config import dictConfig
+from logging.handlers import QueueListener
+
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+# Records are handed to a background listener thread, so logging from coroutines only
+# costs a queue put instead of a locked write to the stream.
+_log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+_listener: QueueListener | None = None
+_configured = False
 
 
 def configure_logging(level: str = "INFO") -> None:
-    """Configure structured logging."""
+    """Configure structured logging once per process."""
+
+    global _configured, _listener
+    if _configured:
+        return
 
     dictConfig(
         {
             "version": 1,
             "disable_existing_loggers": False,
-            "formatters": {
-                "default": {
-                    "format": "%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-                }
-            },
             "handlers": {
-                "console": {
-                    "class": "logging.StreamHandler",
-                    "formatter": "default",
+                "queue": {
+                    "()": "logging.handlers.QueueHandler",
+                    "queue": "ext://sdtrepricer.app.core.logging._log_queue",
                 }
             },
             "root": {
-                "handlers": ["console"],
+                "handlers": ["queue"],
                 "level": level,
             },
         }
     )
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = QueueListener(_log_queue, console, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    _configured = True
 
 
 logger = logging.getLogger("sdtrepricer")
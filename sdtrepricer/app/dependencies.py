@@ -2,18 +2,32 @@
 
 from __future__ import annotations
 
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
+from datetime import datetime, timezone
 
-from .core.database import get_session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .core.database import get_session, get_session_factory
 from .services.ftp_loader import FTPFeedLoader
 from .services.sp_api import SPAPIClient, create_sp_api_client
 
 
-async def get_db() -> AsyncIterator:
-    async with get_session() as session:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with get_session_factory()() as session:
         yield session
 
 
+def get_db_factory() -> Callable[[], AbstractAsyncContextManager[AsyncSession]]:
+    return get_session
+
+
+def utc_now() -> datetime:
+    # FastAPI caches dependency results per request, so every handler parameter that
+    # depends on this shares a single timestamp.
+    return datetime.now(timezone.utc)
+
+
 async def get_sp_api_client() -> AsyncIterator[SPAPIClient]:
     client = await create_sp_api_client()
     try:
@@ -22,5 +36,9 @@ async def get_sp_api_client() -> AsyncIterator[SPAPIClient]:
         await client.close()
 
 
+def get_sp_api_factory() -> Callable[[], Awaitable[SPAPIClient]]:
+    return create_sp_api_client
+
+
 def get_ftp_loader() -> FTPFeedLoader:
     return FTPFeedLoader()
@@ -1,16 +1,31 @@
-import asyncio
+import argparse
+
 from sqlalchemy import create_engine
-from sdtrepricer.app.config import settings
+
+from sdtrepricer.app.core.config import settings
 
 # Import Base directly from models, not via database.py
-from sdtrepricer.app.models import Base  
+from sdtrepricer.app.models import Base
 
-async def async_init_models():
+
+def init_models(fresh: bool = False) -> None:
     # Convert async URL to sync
     sync_url = str(settings.database_url).replace("+asyncpg", "")
-    engine = create_engine(sync_url, echo=True)
-    Base.metadata.create_all(engine)
+    engine = create_engine(sync_url, echo=False)
+    try:
+        # On a known-empty database there is nothing to probe for.
+        Base.metadata.create_all(engine, checkfirst=not fresh)
+    finally:
+        engine.dispose()
     print("✅ Database tables created")
 
+
 if __name__ == "__main__":
-    asyncio.run(async_init_models())
+    parser = argparse.ArgumentParser(description="Create the repricer database tables.")
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="target database is empty; skip per-table existence checks",
+    )
+    args = parser.parse_args()
+    init_models(fresh=args.fresh)
@@ -2,67 +2,80 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from .api import api_router
 from .core.config import settings
-from .core.database import get_session, init_db
+from .core.database import get_session, init_db, warm_pool
 from .core.logging import configure_logging
 from .migrations import run_migrations
 from .models import Marketplace
 from .services.scheduler import RepricingScheduler
 
-app = FastAPI(title=settings.app_name, version="0.1.0")
-configure_logging()
-
-static_dir = Path(__file__).resolve().parent / "static"
-templates = Jinja2Templates(directory=str(Path(__file__).resolve().parent / "templates"))
-app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
+MARKETPLACE_NAMES: dict[str, str] = {
+    "DE": "Germany",
+    "FR": "France",
+    "NL": "Netherlands",
+    "BE": "Belgium",
+    "IT": "Italy",
+}
 
 
 async def ensure_marketplaces() -> None:
     async with get_session() as session:
-        existing_codes = set((await session.scalars(select(Marketplace.code))).all())
-        for code, marketplace_id in settings.marketplace_ids.items():
-            if code in existing_codes:
-                continue
-            session.add(
-                Marketplace(
-                    code=code,
-                    name={
-                        "DE": "Germany",
-                        "FR": "France",
-                        "NL": "Netherlands",
-                        "BE": "Belgium",
-                        "IT": "Italy",
-                    }.get(code, code),
-                    amazon_id=marketplace_id,
-                )
-            )
+        existing = frozenset((await session.scalars(select(Marketplace.code))).all())
+        if existing.issuperset(settings.marketplace_ids):
+            # Steady state after the first boot: nothing to insert, no transaction to commit.
+            return
+        rows = [
+            {"code": code, "name": MARKETPLACE_NAMES.get(code, code), "amazon_id": marketplace_id}
+            for code, marketplace_id in settings.marketplace_ids.items()
+            if code not in existing
+        ]
+        insert = sqlite_insert if session.bind.dialect.name == "sqlite" else pg_insert
+        await session.execute(
+            insert(Marketplace).values(rows).on_conflict_do_nothing(index_elements=["code"])
+        )
         await session.commit()
 
 
-@app.on_event("startup")
-async def on_startup() -> None:
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     await init_db()
-    await run_migrations()
-    await ensure_marketplaces()
+    await warm_pool()
+    # Both only need the schema and touch disjoint tables, so they can share the wait.
+    await asyncio.gather(run_migrations(), ensure_marketplaces())
     scheduler = RepricingScheduler()
     app.state.scheduler = scheduler
     await scheduler.start()
+    try:
+        yield
+    finally:
+        await scheduler.stop()
 
 
-@app.on_event("shutdown")
-async def on_shutdown() -> None:
-    scheduler: RepricingScheduler | None = getattr(app.state, "scheduler", None)
-    if scheduler:
-        await scheduler.stop()
+app = FastAPI(
+    title=settings.app_name,
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
+configure_logging()
+
+static_dir = Path(__file__).resolve().parent / "static"
+templates = Jinja2Templates(directory=str(Path(__file__).resolve().parent / "templates"))
+app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
 
 @app.get("/", response_class=HTMLResponse)
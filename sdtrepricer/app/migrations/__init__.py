@@ -0,0 +1,16 @@
+"""Data migrations applied on application startup."""
+
+from __future__ import annotations
+
+from ..core.database import get_session
+from .profile_defaults import DEFAULT_PROFILE_NAME, ensure_default_profile_assignment
+
+
+async def run_migrations() -> None:
+    """Apply idempotent data migrations after the schema has been created."""
+
+    async with get_session() as session:
+        await ensure_default_profile_assignment(session)
+
+
+__all__ = ["DEFAULT_PROFILE_NAME", "ensure_default_profile_assignment", "run_migrations"]
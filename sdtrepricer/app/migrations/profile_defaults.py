@@ -0,0 +1,54 @@
+"""Ensure every SKU is attached to a repricing profile."""
+
+from __future__ import annotations
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import RepricingProfile, Sku
+
+DEFAULT_PROFILE_NAME = "Default"
+BACKFILL_BATCH_SIZE = 10_000
+
+
+async def ensure_default_profile_assignment(session: AsyncSession) -> int:
+    """Create the default profile if missing and assign it to unprofiled SKUs.
+
+    Returns the default profile id. On an already-migrated database this costs one
+    upsert and one ``LIMIT 1`` probe; the backfill runs in batches so it never locks
+    every unassigned SKU at once.
+    """
+
+    insert = sqlite_insert if session.bind.dialect.name == "sqlite" else pg_insert
+    profile_id = await session.scalar(
+        insert(RepricingProfile)
+        .values(name=DEFAULT_PROFILE_NAME)
+        .on_conflict_do_nothing(index_elements=["name"])
+        .returning(RepricingProfile.id)
+    )
+    if profile_id is None:
+        profile_id = await session.scalar(
+            select(RepricingProfile.id).where(RepricingProfile.name == DEFAULT_PROFILE_NAME)
+        )
+        pending = await session.scalar(select(Sku.id).where(Sku.profile_id.is_(None)).limit(1))
+        if pending is None:
+            await session.commit()
+            return profile_id
+
+    batch = select(Sku.id).where(Sku.profile_id.is_(None)).limit(BACKFILL_BATCH_SIZE)
+    while True:
+        result = await session.execute(
+            update(Sku)
+            .where(Sku.id.in_(batch))
+            .values(profile_id=profile_id)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        if result.rowcount < BACKFILL_BATCH_SIZE:
+            break
+    return profile_id
+
+
+__all__ = ["DEFAULT_PROFILE_NAME", "ensure_default_profile_assignment"]
@@ -2,11 +2,26 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal
 from enum import Enum as PyEnum
-from decimal import Decimal
 
-from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, Integer, Numeric, String, Text, UniqueConstraint
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    UniqueConstraint,
+    cast,
+    text,
+)
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -14,6 +29,31 @@ class Base(DeclarativeBase):
     """Base declarative class."""
 
 
+def _cents_property(attr: str) -> hybrid_property:
+    """Expose an integer-cents column as a two-decimal ``Decimal`` price."""
+
+    def fget(self) -> Decimal | None:
+        cents = getattr(self, attr)
+        return None if cents is None else Decimal(cents).scaleb(-2)
+
+    def fset(self, value: Decimal | float | None) -> None:
+        setattr(
+            self,
+            attr,
+            None
+            if value is None
+            else int(
+                ((value if isinstance(value, Decimal) else Decimal(str(value))) * 100)
+                .to_integral_value(rounding=ROUND_HALF_UP)
+            ),
+        )
+
+    def expr(cls):
+        return cast(getattr(cls, attr), Numeric(12, 2)) / 100
+
+    return hybrid_property(fget, fset, expr=expr)
+
+
 class Marketplace(Base):
     """Amazon marketplace definition."""
 
@@ -24,7 +64,7 @@ class Marketplace(Base):
     name: Mapped[str] = mapped_column(String(64), nullable=False)
     amazon_id: Mapped[str] = mapped_column(String(32), nullable=False)
 
-    skus: Mapped[list["Sku"]] = relationship(
+    skus: Mapped[list[Sku]] = relationship(
         "Sku", back_populates="marketplace", cascade="all, delete-orphan"
     )
 
@@ -43,9 +83,12 @@ class RepricingProfile(Base):
     margin_policy: Mapped[dict[str, object]] = mapped_column(JSON, default=dict)
     step_up_percentage: Mapped[Decimal] = mapped_column(Numeric(5, 2), default=Decimal("2.00"))
     step_up_interval_hours: Mapped[int] = mapped_column(Integer, default=6)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    # Python-side default: the value is known after flush, so no refresh is needed.
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
 
-    skus: Mapped[list["Sku"]] = relationship("Sku", back_populates="profile")
+    skus: Mapped[list[Sku]] = relationship("Sku", back_populates="profile")
 
 
 
@@ -53,7 +96,15 @@ class Sku(Base):
     """SKU level configuration and metrics."""
 
     __tablename__ = "skus"
-    __table_args__ = (UniqueConstraint("sku", "marketplace_id", name="uq_sku_marketplace"),)
+    __table_args__ = (
+        UniqueConstraint("sku", "marketplace_id", name="uq_sku_marketplace"),
+        # Covers the dashboard's per-marketplace Buy Box aggregate with an index-only scan.
+        Index("sku_mp_bb_idx", "marketplace_id", postgresql_include=["hold_buy_box"]),
+        # Scheduler fan-out: SKUs of one profile within a marketplace. Also serves
+        # profile-only lookups through its leading column.
+        Index("ix_skus_profile_marketplace", "profile_id", "marketplace_id"),
+        Index("ix_skus_marketplace_sku", "marketplace_id", "sku"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     sku: Mapped[str] = mapped_column(String(64), nullable=False)
@@ -62,27 +113,31 @@ class Sku(Base):
     profile_id: Mapped[int | None] = mapped_column(
         ForeignKey("repricing_profiles.id", ondelete="SET NULL"), nullable=True
     )
-    min_price: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
-    min_business_price: Mapped[Decimal | None] = mapped_column(Numeric(12, 2), nullable=True)
+    # Prices are stored as integer cents; the Decimal attributes below convert at the
+    # boundary. The legacy Numeric columns are left in place by the migration, unmapped
+    # (SQLite drops min_price, whose NOT NULL it cannot relax).
+    min_price_cents: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    min_business_price_cents: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     last_min_price_sync: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     hold_buy_box: Mapped[bool] = mapped_column(Boolean, default=False)
-    last_updated_price: Mapped[Decimal | None] = mapped_column(Numeric(12, 2))
-    last_updated_business_price: Mapped[Decimal | None] = mapped_column(Numeric(12, 2))
+    last_updated_price_cents: Mapped[int | None] = mapped_column(BigInteger)
+    last_updated_business_price_cents: Mapped[int | None] = mapped_column(BigInteger)
     last_price_update: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     last_buy_box_check: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
-    repricing_profile_id: Mapped[int | None] = mapped_column(
-        ForeignKey("repricing_profiles.id", ondelete="SET NULL"),
-        nullable=True,
-    )
 
-    marketplace: Mapped["Marketplace"] = relationship("Marketplace", back_populates="skus")
+    marketplace: Mapped[Marketplace] = relationship("Marketplace", back_populates="skus")
 
     profile: Mapped[RepricingProfile | None] = relationship("RepricingProfile", back_populates="skus")
 
-    price_events: Mapped[list["PriceEvent"]] = relationship(
+    price_events: Mapped[list[PriceEvent]] = relationship(
         "PriceEvent", back_populates="sku", cascade="all, delete-orphan"
     )
 
+    min_price = _cents_property("min_price_cents")
+    min_business_price = _cents_property("min_business_price_cents")
+    last_updated_price = _cents_property("last_updated_price_cents")
+    last_updated_business_price = _cents_property("last_updated_business_price_cents")
+
 
 class RepricingRun(Base):
     """Repricing batch run telemetry."""
@@ -98,13 +153,15 @@ class RepricingRun(Base):
     updated: Mapped[int] = mapped_column(Integer, default=0)
     errors: Mapped[int] = mapped_column(Integer, default=0)
 
-    marketplace: Mapped["Marketplace"] = relationship("Marketplace")
+    marketplace: Mapped[Marketplace] = relationship("Marketplace")
 
 
 class PriceEvent(Base):
     """Historical price changes for auditing and reporting."""
 
     __tablename__ = "price_events"
+    # Latest price event per SKU, read by the UI and the step-up logic.
+    __table_args__ = (Index("ix_price_events_sku_created", "sku_id", text("created_at DESC")),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     sku_id: Mapped[int] = mapped_column(ForeignKey("skus.id", ondelete="CASCADE"))
@@ -116,7 +173,7 @@ class PriceEvent(Base):
     reason: Mapped[str] = mapped_column(String(128), nullable=False)
     context: Mapped[dict[str, object] | None] = mapped_column(JSON, nullable=True)
 
-    sku: Mapped["Sku"] = relationship("Sku", back_populates="price_events")
+    sku: Mapped[Sku] = relationship("Sku", back_populates="price_events")
 
 
 class AlertSeverity(str, PyEnum):
@@ -131,9 +188,13 @@ class Alert(Base):
     """System alert for monitoring."""
 
     __tablename__ = "alerts"
+    # The dashboard reads the newest alerts: ORDER BY created_at DESC LIMIT 20.
+    __table_args__ = (Index("alert_created_desc_idx", text("created_at DESC")),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
     message: Mapped[str] = mapped_column(Text, nullable=False)
     severity: Mapped[str] = mapped_column(String(16), default=AlertSeverity.INFO.value)
     metadata_payload: Mapped[dict[str, object] | None] = mapped_column(
@@ -179,4 +240,6 @@ class SystemSetting(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     key: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
     value: Mapped[str] = mapped_column(String(256), nullable=False)
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
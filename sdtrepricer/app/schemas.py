@@ -79,6 +79,21 @@ class ManualPriceUpdate(BaseModel):
     business_price: Decimal | None = None
 
 
+class ManualPriceFailure(BaseModel):
+    """A manual price update that SP-API did not accept."""
+
+    marketplace_code: str
+    sku: str
+    error: str
+
+
+class ManualPriceBatchResult(BaseModel):
+    """Outcome of a batch of manual price updates."""
+
+    updated: list[ManualPriceUpdate]
+    failed: list[ManualPriceFailure] = Field(default_factory=list)
+
+
 class BulkFeedUploadResponse(BaseModel):
     """Response for manual feed upload."""
 
@@ -94,6 +109,7 @@ class DashboardPayload(BaseModel):
     health: SystemHealth
     alerts: list[AlertPayload]
     settings: RepricerSettings
+    simulated_events: list[SimulatedPriceOutcome] = Field(default_factory=list)
 
 class AggressivenessSettings(BaseModel):
     """Controls around undercutting and competitiveness."""
@@ -2,14 +2,17 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.logging import logger
 from ..models import Alert, AlertSeverity
 
+_SEVERITY_VALUES = {severity: severity.value for severity in AlertSeverity}
+
 
 async def create_alert(
     session: AsyncSession,
@@ -19,11 +22,42 @@ async def create_alert(
 ) -> Alert:
     alert = Alert(
         message=message,
-        severity=severity.value,
+        severity=_SEVERITY_VALUES[severity],
         metadata_payload=metadata,
-        created_at=datetime.utcnow(),
+        created_at=datetime.now(timezone.utc),
     )
     session.add(alert)
     await session.flush()
-    logger.warning("Alert issued: %s (%s)", message, severity.value)
+    logger.warning("Alert issued: %s (%s)", message, _SEVERITY_VALUES[severity])
     return alert
+
+
+class AlertCollector:
+    """Gather alerts raised during a run and write them in one statement."""
+
+    def __init__(self) -> None:
+        self._rows: list[dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def append(
+        self,
+        message: str,
+        severity: AlertSeverity = AlertSeverity.WARNING,
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        value = _SEVERITY_VALUES[severity]
+        self._rows.append(
+            {"message": message, "severity": value, "metadata_payload": metadata}
+        )
+        logger.warning("Alert issued: %s (%s)", message, value)
+
+    async def flush(self, session: AsyncSession, created_at: datetime | None = None) -> None:
+        if not self._rows:
+            return
+        created_at = created_at or datetime.now(timezone.utc)
+        await session.execute(
+            insert(Alert), [row | {"created_at": created_at} for row in self._rows]
+        )
+        self._rows.clear()
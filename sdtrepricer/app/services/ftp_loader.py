@@ -2,18 +2,19 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable
 
-import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 
 from ..core.config import settings
 from ..core.logging import logger
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FloorPriceRecord:
     """Floor price entry parsed from FTP feed."""
 
@@ -23,6 +24,24 @@ class FloorPriceRecord:
     min_business_price: float | None
 
 
+# ``(min_price, min_business_price)``: all the repricer reads from a feed row.
+FloorPrice = tuple[float, "float | None"]
+
+FEED_BLOCK_SIZE = 64 << 20
+FEED_COLUMN_TYPES = {
+    "SKU": pa.string(),
+    "ASIN": pa.string(),
+    "MIN_PRICE": pa.float64(),
+    "MIN_BUSINESS_PRICE": pa.float64(),
+}
+
+# Feeds are dropped hourly but runs are far more frequent, so parsed maps are kept
+# until the file's (mtime, size) signature changes. Shared by every loader instance:
+# the API builds a fresh loader per request, the scheduler keeps one for its lifetime.
+FLOOR_MAP_CACHE_SIZE = 16
+_floor_maps: dict[Path, tuple[int, int, dict[str, FloorPrice]]] = {}
+
+
 class FTPFeedLoader:
     """Load and validate hourly CSV feeds."""
 
@@ -37,31 +56,89 @@ class FTPFeedLoader:
         path = self._resolve_file(marketplace_code)
         if not path.exists():
             logger.warning("FTP feed missing for %s", marketplace_code)
+            _floor_maps.pop(path.resolve(), None)
             return False
-        modified = datetime.fromtimestamp(path.stat().st_mtime)
-        is_fresh = datetime.utcnow() - modified < timedelta(minutes=settings.ftp_stale_threshold_minutes)
+        modified = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc)
+        stale_after = timedelta(minutes=settings.ftp_stale_threshold_minutes)
+        is_fresh = datetime.now(timezone.utc) - modified < stale_after
         if not is_fresh:
             logger.warning("FTP feed stale for %s (last modified %s)", marketplace_code, modified)
         return is_fresh
 
-    def load(self, marketplace_code: str) -> Iterable[FloorPriceRecord]:
+    def load_map(self, marketplace_code: str) -> dict[str, FloorPrice]:
+        """Return :meth:`load_tuples`, re-parsing only when the file has changed."""
+
+        path = self._resolve_file(marketplace_code).resolve()
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            _floor_maps.pop(path, None)
+            raise FileNotFoundError(f"FTP feed missing for {marketplace_code}") from None
+        cached = _floor_maps.pop(path, None)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            cached = (stat.st_mtime_ns, stat.st_size, self.load_tuples(marketplace_code))
+        # Re-inserted so the dict stays in least-recently-used order.
+        _floor_maps[path] = cached
+        while len(_floor_maps) > FLOOR_MAP_CACHE_SIZE:
+            del _floor_maps[next(iter(_floor_maps))]
+        return cached[2]
+
+    def _open(self, marketplace_code: str) -> tuple[pa_csv.CSVStreamingReader, bool]:
+        """Open the feed, validate its header and report whether business prices exist."""
+
         path = self._resolve_file(marketplace_code)
         if not path.exists():
             raise FileNotFoundError(f"FTP feed missing for {marketplace_code}")
+        # Arrow's multithreaded parser yields typed column batches; rows are only
+        # materialized as Python values when they are consumed.
         try:
-            df = pd.read_csv(path)
+            reader = pa_csv.open_csv(
+                path,
+                read_options=pa_csv.ReadOptions(block_size=FEED_BLOCK_SIZE),
+                convert_options=pa_csv.ConvertOptions(column_types=FEED_COLUMN_TYPES),
+            )
         except Exception as exc:  # pragma: no cover - defensive guard
             logger.exception("Failed to load FTP feed %s: %s", path, exc)
             raise
+        columns = set(reader.schema.names)
         required_columns = {"SKU", "ASIN", "MIN_PRICE"}
-        if missing := required_columns - set(df.columns):
+        if missing := required_columns - columns:
             raise ValueError(f"Missing columns in feed: {missing}")
-        for row in df.itertuples():
-            yield FloorPriceRecord(
-                sku=str(row.SKU),
-                asin=str(row.ASIN),
-                min_price=float(row.MIN_PRICE),
-                min_business_price=float(row.MIN_BUSINESS_PRICE)
-                if "MIN_BUSINESS_PRICE" in df.columns and not pd.isna(row.MIN_BUSINESS_PRICE)
-                else None,
+        return reader, "MIN_BUSINESS_PRICE" in columns
+
+    def load_tuples(self, marketplace_code: str) -> dict[str, FloorPrice]:
+        """Return ``{sku: (min_price, min_business_price)}`` without building records."""
+
+        reader, has_business = self._open(marketplace_code)
+        floor_map: dict[str, FloorPrice] = {}
+        for batch in reader:
+            prices = batch.column("MIN_PRICE").to_pylist()
+            floor_map.update(
+                zip(
+                    batch.column("SKU").to_pylist(),
+                    zip(prices, batch.column("MIN_BUSINESS_PRICE").to_pylist(), strict=True)
+                    if has_business
+                    else ((price, None) for price in prices),
+                    strict=True,
+                )
+            )
+        return floor_map
+
+    def load(self, marketplace_code: str) -> Iterable[FloorPriceRecord]:
+        reader, has_business = self._open(marketplace_code)
+        for batch in reader:
+            skus = batch.column("SKU").to_pylist()
+            asins = batch.column("ASIN").to_pylist()
+            prices = batch.column("MIN_PRICE").to_pylist()
+            business = (
+                batch.column("MIN_BUSINESS_PRICE").to_pylist()
+                if has_business
+                else [None] * batch.num_rows
             )
+            for sku, asin, price, business_price in zip(skus, asins, prices, business, strict=True):
+                yield FloorPriceRecord(
+                    sku=sku,
+                    asin=asin,
+                    min_price=price,
+                    min_business_price=business_price,
+                )
@@ -3,28 +3,39 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import asdict, dataclass
-from datetime import datetime, timedelta
-from decimal import Decimal
+import logging
+from collections.abc import AsyncIterator, Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal
 from enum import Enum
 from typing import Any
 
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import Select, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from ..core.config import settings
 from ..core.logging import logger
-
-from ..models import AlertSeverity, Marketplace, PriceEvent, RepricingProfile, RepricingRun, Sku
-
-from .alerts import create_alert
-from .ftp_loader import FTPFeedLoader, FloorPriceRecord
+from ..models import (
+    AlertSeverity,
+    Marketplace,
+    PriceEvent,
+    RepricingProfile,
+    RepricingRun,
+    Sku,
+    SystemSetting,
+)
+from .alerts import AlertCollector
+from .ftp_loader import FloorPrice, FloorPriceRecord, FTPFeedLoader
+from .pricing_kernels import price_batch
 from .sp_api import SPAPIClient
-from .test_data import load_competitor_offers, load_floor_prices
+from .test_data import iter_competitor_offers, load_floor_map
 
 
-@dataclass
+@dataclass(slots=True)
 class CompetitorOffer:
     """Simplified competitor offer from SP-API response."""
 
@@ -34,7 +45,38 @@ class CompetitorOffer:
     fulfillment_type: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class OfferSummary:
+    """The part of an ASIN's offers the pricing rules read.
+
+    ``best_price``/``best_seller`` describe the cheapest offer that does not hold the
+    Buy Box.
+    """
+
+    count: int = 0
+    best_price: float | None = None
+    best_seller: str | None = None
+
+    @classmethod
+    def from_offers(cls, offers: Iterable[Any]) -> OfferSummary:
+        count = 0
+        best_price: float | None = None
+        best_seller: str | None = None
+        for offer in offers:
+            count += 1
+            if not offer.is_buy_box and (best_price is None or offer.price < best_price):
+                best_price, best_seller = offer.price, offer.seller_id
+        return cls(count, best_price, best_seller)
+
+
+_NO_OFFERS = OfferSummary()
+
+
+def _summarize(offers: OfferSummary | Sequence[CompetitorOffer]) -> OfferSummary:
+    return offers if isinstance(offers, OfferSummary) else OfferSummary.from_offers(offers)
+
+
+@dataclass(slots=True, frozen=True)
 class PriceComputation:
     sku: Sku
     new_price: Decimal | None
@@ -42,6 +84,16 @@ class PriceComputation:
     context: dict[str, Any]
 
 
+# Shared by every skipped computation; they are never persisted, so never mutated.
+_NOOP_CONTEXT: dict[str, Any] = {"skipped": "noop"}
+# Rejected SKUs named in a submission alert; the rest are only counted.
+_FAILED_SKUS_IN_ALERT = 50
+
+
+def _noop(sku: Sku) -> PriceComputation:
+    return PriceComputation(sku=sku, new_price=None, new_business_price=None, context=_NOOP_CONTEXT)
+
+
 class StepUpType(str, Enum):
     """Supported step-up configurations."""
 
@@ -49,13 +101,65 @@ class StepUpType(str, Enum):
     ABSOLUTE = "absolute"
 
 
-@dataclass
+@dataclass(slots=True)
 class StepUpConfig:
     """Resolved step-up behaviour for a SKU evaluation."""
 
     type: StepUpType
     value: Decimal
     interval: timedelta
+    # ``value`` in the units _step_up works in: basis points or cents.
+    amount: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.amount = (
+            _basis_points(self.value)
+            if self.type is StepUpType.PERCENTAGE
+            else _to_cents(self.value)
+        )
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive timestamps; they are stored as UTC.
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+_RATIO_BASE = 10_000
+_HUNDRED = Decimal(100)
+
+
+def _decimal(value: float | Decimal) -> Decimal:
+    # Floats go through str() so 19.99 means 19.99, not its binary expansion; Decimal
+    # values (profile columns, step-up settings) are used as they are.
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _basis_points(percent: float | Decimal) -> int:
+    """``2.5`` (percent) -> ``250``; ratios are then ``(_RATIO_BASE + bp) / _RATIO_BASE``."""
+
+    return int((_decimal(percent) * _HUNDRED).to_integral_value(ROUND_HALF_UP))
+
+
+def _to_cents(amount: float | Decimal) -> int:
+    return int((_decimal(amount) * _HUNDRED).to_integral_value(ROUND_HALF_UP))
+
+
+def _scale(cents: int, numerator: int, denominator: int) -> int:
+    """``cents * numerator / denominator`` rounded half-up in pure integer math."""
+
+    return (cents * numerator * 2 + denominator) // (denominator * 2)
+
+
+def _floor_values(floor: FloorPriceRecord | FloorPrice) -> FloorPrice:
+    if isinstance(floor, tuple):
+        return floor
+    return floor.min_price, floor.min_business_price
+
+
+def _coerce_step_up_type(value: StepUpType | str) -> StepUpType:
+    if isinstance(value, StepUpType):
+        return value
+    return StepUpType(str(value).lower())
 
 
 class PricingStrategy:
@@ -70,65 +174,127 @@ class PricingStrategy:
         undercut_percent: float = 0.5,
         min_margin_percent: float = 0.0,
     ) -> None:
-
-        self.step_up_percentage = step_up_percentage
-        self.step_up_interval = timedelta(hours=step_up_interval_hours)
-
+        self.step_up_type = _coerce_step_up_type(step_up_type or settings.step_up_type)
+        self.step_up_value = _decimal(
+            step_up_value if step_up_value is not None else settings.step_up_value
+        )
+        self.step_up_interval = timedelta(
+            hours=float(
+                step_up_interval_hours
+                if step_up_interval_hours is not None
+                else settings.step_up_interval_hours
+            )
+        )
         self.max_daily_change_percent = (
             max_daily_change_percent
             if max_daily_change_percent is not None
             else settings.max_price_change_percent
         )
-
         self.undercut_percent = undercut_percent
         self.min_margin_percent = min_margin_percent
+        # The scalar rules work in integer cents; percentages become ratios over
+        # _RATIO_BASE, computed once here instead of per SKU.
+        self._threshold = _RATIO_BASE + _basis_points(self.max_daily_change_percent)
+        self._margin_ratio = _RATIO_BASE + _basis_points(max(self.min_margin_percent, 0))
+        self._undercut_ratio = _RATIO_BASE - min(
+            max(_basis_points(self.undercut_percent), 0), _RATIO_BASE
+        )
+        self._default_step_up = StepUpConfig(
+            type=self.step_up_type, value=self.step_up_value, interval=self.step_up_interval
+        )
+        # Input arrays for determine_prices, reused across batches. Pricing never awaits,
+        # so a shared strategy is only ever filling one batch at a time.
+        self._buffers: dict[str, np.ndarray] = {}
 
+    def _build_step_up_config(
+        self,
+        step_up_type: StepUpType | str | None = None,
+        step_up_value: float | Decimal | None = None,
+        step_up_interval_hours: float | None = None,
+    ) -> StepUpConfig:
+        if step_up_type is None and step_up_value is None and step_up_interval_hours is None:
+            return self._default_step_up
+        return StepUpConfig(
+            type=_coerce_step_up_type(step_up_type) if step_up_type else self.step_up_type,
+            value=(
+                _decimal(step_up_value) if step_up_value is not None else self.step_up_value
+            ),
+            interval=(
+                timedelta(hours=float(step_up_interval_hours))
+                if step_up_interval_hours is not None
+                else self.step_up_interval
+            ),
+        )
+
+    def _fill(self, name: str, values: list[float]) -> np.ndarray:
+        size = len(values)
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape[0] < size:
+            buffer = self._buffers[name] = np.empty(
+                max(size, settings.repricing_batch_size), dtype=np.float64
+            )
+        view = buffer[:size]
+        view[:] = values
+        return view
 
-    def _enforce_minimum(self, new_price: Decimal, sku: Sku) -> Decimal:
-        return max(new_price, sku.min_price)
+    def _enforce_minimum(self, new_price: int, sku: Sku) -> int:
+        return max(new_price, sku.min_price_cents)
 
-    def _enforce_daily_threshold(self, new_price: Decimal, sku: Sku) -> Decimal:
-        if sku.last_updated_price is None:
+    def _enforce_daily_threshold(self, new_price: int, sku: Sku) -> int:
+        last = sku.last_updated_price_cents
+        if last is None:
             return new_price
-        threshold = Decimal("1") + (Decimal(str(self.max_daily_change_percent)) / Decimal("100"))
-        max_allowed = sku.last_updated_price * threshold
-        min_allowed = sku.last_updated_price / threshold
+        max_allowed = _scale(last, self._threshold, _RATIO_BASE)
+        min_allowed = _scale(last, _RATIO_BASE, self._threshold)
         return min(max(new_price, min_allowed), max_allowed)
 
-
-    def _apply_margin_policy(self, new_price: Decimal, floor: FloorPriceRecord) -> Decimal:
+    def _apply_margin_policy(self, new_price: int, floor_price: int) -> int:
         if self.min_margin_percent <= 0:
             return new_price
-        baseline = Decimal(str(floor.min_price))
-        margin_ratio = Decimal("1") + Decimal(str(self.min_margin_percent)) / Decimal("100")
-        required = baseline * margin_ratio
-        return max(new_price, required)
-
-    def _step_up(self, sku: Sku) -> Decimal | None:
+        return max(new_price, _scale(floor_price, self._margin_ratio, _RATIO_BASE))
 
-        if not sku.last_updated_price:
+    def _step_up(self, sku: Sku, config: StepUpConfig, now: datetime) -> int | None:
+        last = sku.last_updated_price_cents
+        if not last:
             return None
         if not sku.last_price_update:
             return None
-        if datetime.utcnow() - sku.last_price_update < config.interval:
+        if now - _as_utc(sku.last_price_update) < config.interval:
             return None
         if config.type is StepUpType.PERCENTAGE:
-            multiplier = Decimal("1") + (config.value / Decimal("100"))
-            return sku.last_updated_price * multiplier
-        return sku.last_updated_price + config.value
+            return _scale(last, _RATIO_BASE + config.amount, _RATIO_BASE)
+        return last + config.amount
 
     def determine_price(
         self,
         sku: Sku,
-        offers: list[CompetitorOffer],
-        floor: FloorPriceRecord,
+        offers: OfferSummary | Sequence[CompetitorOffer],
+        floor: FloorPriceRecord | FloorPrice,
         *,
         step_up_type: StepUpType | str | None = None,
         step_up_value: float | Decimal | None = None,
         step_up_interval_hours: float | None = None,
+        now: datetime | None = None,
+        skip_noop: bool = True,
     ) -> PriceComputation:
+        offers = _summarize(offers)
+        floor_min, floor_business = _floor_values(floor)
+        floor_price = _to_cents(floor_min)
+        last = sku.last_updated_price_cents
+        if (
+            skip_noop
+            and not sku.hold_buy_box
+            and offers.best_price is None
+            and last is not None
+            and last >= floor_price
+            and last >= sku.min_price_cents
+            and self._apply_margin_policy(last, floor_price) == last
+        ):
+            # Nothing to chase and every clamp already holds: the result would be the
+            # stored price, so skip the rules and the context entirely.
+            return _noop(sku)
         context: dict[str, Any] = {
-            "competitor_count": len(offers),
+            "competitor_count": offers.count,
             "hold_buy_box": sku.hold_buy_box,
             "undercut_percent": self.undercut_percent,
         }
@@ -141,40 +307,177 @@ class PricingStrategy:
             "interval_hours": step_up_config.interval.total_seconds() / 3600,
         }
         # Default to maintain last price if no offers
-        candidate_price = sku.last_updated_price or Decimal(str(floor.min_price))
+        candidate_price = last or floor_price
         if sku.hold_buy_box:
-            step_up_price = self._step_up(sku, step_up_config)
+            step_up_price = self._step_up(
+                sku, step_up_config, _as_utc(now) if now else datetime.now(timezone.utc)
+            )
             context["step_up_candidate"] = (
-                float(step_up_price) if step_up_price is not None else None
+                step_up_price / 100 if step_up_price is not None else None
             )
             if step_up_price is not None:
                 candidate_price = max(candidate_price, step_up_price)
         else:
-            # Find best competitor price
-            competitor_prices = [offer.price for offer in offers if not offer.is_buy_box]
-            if competitor_prices:
-                best_competitor = min(competitor_prices)
-                candidate_price = Decimal(str(best_competitor))
+            best_competitor = offers.best_price
+            if best_competitor is not None:
+                candidate_price = _scale(
+                    _to_cents(best_competitor), self._undercut_ratio, _RATIO_BASE
+                )
                 context["target_competitor"] = best_competitor
-                undercut_ratio = Decimal(str(self.undercut_percent)) / Decimal("100")
-                undercut_ratio = max(Decimal("0"), min(undercut_ratio, Decimal("1")))
-                candidate_price *= Decimal("1") - undercut_ratio
-        candidate_price = max(candidate_price, Decimal(str(floor.min_price)))
-        candidate_price = self._apply_margin_policy(candidate_price, floor)
+        candidate_price = max(candidate_price, floor_price)
+        candidate_price = self._apply_margin_policy(candidate_price, floor_price)
         candidate_price = self._enforce_minimum(candidate_price, sku)
         candidate_price = self._enforce_daily_threshold(candidate_price, sku)
         business_price = (
-            max(Decimal(str(floor.min_business_price)), candidate_price)
-            if floor.min_business_price is not None
+            max(_to_cents(floor_business), candidate_price)
+            if floor_business is not None
             else None
         )
         return PriceComputation(
             sku=sku,
-            new_price=candidate_price,
-            new_business_price=business_price,
+            new_price=Decimal(candidate_price).scaleb(-2),
+            new_business_price=(
+                Decimal(business_price).scaleb(-2) if business_price is not None else None
+            ),
             context=context,
         )
 
+    def determine_prices(
+        self,
+        items: list[
+            tuple[Sku, OfferSummary | Sequence[CompetitorOffer], FloorPriceRecord | FloorPrice]
+        ],
+        now: datetime | None = None,
+        skip_noop: bool = True,
+    ) -> list[PriceComputation]:
+        """Evaluate a whole batch of ``(sku, offers, floor)`` triples at once.
+
+        Mirrors :meth:`determine_price` with array kernels over whole cents, rounding
+        half-up at the same steps, so both paths produce identical prices. With
+        ``skip_noop=False`` steady-state SKUs are priced too instead of skipped.
+        """
+
+        now = _as_utc(now) if now is not None else datetime.now(timezone.utc)
+        if len(items) <= 1:
+            return [
+                self.determine_price(sku, offers, floor, now=now, skip_noop=skip_noop)
+                for sku, offers, floor in items
+            ]
+        config = self._build_step_up_config()
+        nan = float("nan")
+        skus = [sku for sku, _, _ in items]
+        summaries = [_summarize(offers) for _, offers, _ in items]
+        floors = [_floor_values(record) for _, _, record in items]
+        floor = self._fill("floor", [_to_cents(min_value) for min_value, _ in floors])
+        last = self._fill(
+            "last",
+            [
+                nan if sku.last_updated_price_cents is None else sku.last_updated_price_cents
+                for sku in skus
+            ],
+        )
+        min_price = self._fill("min_price", [sku.min_price_cents for sku in skus])
+        hold = np.array([bool(sku.hold_buy_box) for sku in skus])
+        best = self._fill(
+            "best",
+            [
+                nan if summary.best_price is None else _to_cents(summary.best_price)
+                for summary in summaries
+            ],
+        )
+        business_floor = self._fill(
+            "business_floor",
+            [nan if business is None else _to_cents(business) for _, business in floors],
+        )
+
+        updated_at = self._fill(
+            "updated_at",
+            [
+                _as_utc(sku.last_price_update).timestamp() if sku.last_price_update else nan
+                for sku in skus
+            ],
+        )
+        margin_num = self._margin_ratio if self.min_margin_percent > 0 else _RATIO_BASE
+        candidate, business, step_due, step_price = price_batch(
+            last,
+            updated_at,
+            hold,
+            min_price,
+            floor,
+            business_floor,
+            best,
+            now_ts=now.timestamp(),
+            step_is_percentage=config.type is StepUpType.PERCENTAGE,
+            step_amount=config.amount,
+            step_interval_s=config.interval.total_seconds(),
+            undercut_num=self._undercut_ratio,
+            margin_num=margin_num,
+            threshold_num=self._threshold,
+            base=_RATIO_BASE,
+        )
+        has_last = ~np.isnan(last)
+        chase = ~hold & ~np.isnan(best)
+        unchanged = has_last & (candidate == last)
+        # Same rows determine_price short-circuits: nothing to chase and the stored
+        # price already clears the floor, margin and minimum.
+        with np.errstate(invalid="ignore"):
+            noop = (
+                skip_noop
+                & ~hold
+                & np.isnan(best)
+                & has_last
+                & (last >= min_price)
+                & (last >= (floor * (2 * margin_num) + _RATIO_BASE) // (2 * _RATIO_BASE))
+            )
+
+        step_context = {
+            "type": config.type.value,
+            "value": float(config.value),
+            "interval_hours": config.interval.total_seconds() / 3600,
+        }
+        computations = []
+        for idx, (sku, summary) in enumerate(zip(skus, summaries, strict=True)):
+            if noop[idx]:
+                computations.append(_noop(sku))
+                continue
+            context: dict[str, Any] = {
+                "competitor_count": summary.count,
+                "hold_buy_box": sku.hold_buy_box,
+                "undercut_percent": self.undercut_percent,
+                "step_up": dict(step_context),
+            }
+            if hold[idx]:
+                context["step_up_candidate"] = (
+                    float(step_price[idx]) / 100 if step_due[idx] else None
+                )
+            elif chase[idx]:
+                context["target_competitor"] = summary.best_price
+            # Unchanged rows keep the stored Decimal; only moved prices are converted.
+            new_price = (
+                sku.last_updated_price
+                if unchanged[idx]
+                else Decimal(int(candidate[idx])).scaleb(-2)
+            )
+            computations.append(
+                PriceComputation(
+                    sku=sku,
+                    new_price=new_price,
+                    new_business_price=(
+                        None
+                        if np.isnan(business[idx])
+                        else Decimal(int(business[idx])).scaleb(-2)
+                    ),
+                    context=context,
+                )
+            )
+        return computations
+
+
+# Strategies are immutable once built, so runs share them per resolved profile
+# configuration; an edited profile simply resolves to a new key.
+_PROFILE_STRATEGY_CACHE_SIZE = 256
+_profile_strategies: dict[tuple[Any, ...], PricingStrategy] = {}
+
 
 class Repricer:
     """Main repricing service handling orchestration."""
@@ -203,20 +506,30 @@ class Repricer:
             return setting.value.lower() in {"1", "true", "yes", "on"}
         return settings.test_mode
 
-
-    async def _fetch_skus(
-        self, marketplace: Marketplace, profile_id: int | None = None
-    ) -> list[Sku]:
-        stmt = (
-            select(Sku)
-            .where(Sku.marketplace_id == marketplace.id)
-            .options(selectinload(Sku.profile))
-        )
+    def _skus_stmt(self, marketplace: Marketplace, profile_id: int | None) -> Select:
+        stmt = select(Sku).where(Sku.marketplace_id == marketplace.id)
         if profile_id is not None:
             stmt = stmt.where(Sku.profile_id == profile_id)
-        result = await self.session.execute(stmt)
+        return stmt
 
-        return list(result.scalars().all())
+    async def _has_skus(self, marketplace: Marketplace, profile_id: int | None = None) -> bool:
+        probe = self._skus_stmt(marketplace, profile_id).with_only_columns(Sku.id).limit(1)
+        return await self.session.scalar(probe) is not None
+
+    async def _stream_skus(
+        self, marketplace: Marketplace, profile_id: int | None, batch_size: int
+    ) -> AsyncIterator[list[Sku]]:
+        stmt = (
+            self._skus_stmt(marketplace, profile_id)
+            # Many-to-one, so the profile rides along in the same SELECT. Nothing else is
+            # read from the SKU's relationships; a stray lazy load fails loudly instead
+            # of issuing a query per row.
+            .options(joinedload(Sku.profile), raiseload("*"))
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream_scalars(stmt)
+        async for batch in result.partitions(batch_size):
+            yield list(batch)
 
     def _strategy_for_profile(self, profile: RepricingProfile | None) -> PricingStrategy:
         if profile is None:
@@ -225,40 +538,76 @@ class Repricer:
         margin_policy = profile.margin_policy or {}
         undercut = float(aggressiveness.get("undercut_percent", self.strategy.undercut_percent))
         min_margin = float(margin_policy.get("min_margin_percent", self.strategy.min_margin_percent))
-        return PricingStrategy(
-            step_up_percentage=float(profile.step_up_percentage or 0),
-            step_up_interval_hours=profile.step_up_interval_hours,
-            max_daily_change_percent=float(profile.price_change_limit_percent or 0),
-            undercut_percent=undercut,
-            min_margin_percent=min_margin,
+        key = (
+            profile.step_up_percentage or 0,
+            profile.step_up_interval_hours,
+            float(profile.price_change_limit_percent or 0),
+            undercut,
+            min_margin,
         )
+        strategy = _profile_strategies.get(key)
+        if strategy is None:
+            if len(_profile_strategies) >= _PROFILE_STRATEGY_CACHE_SIZE:
+                _profile_strategies.clear()
+            strategy = _profile_strategies[key] = PricingStrategy(
+                step_up_type=StepUpType.PERCENTAGE,
+                step_up_value=key[0],
+                step_up_interval_hours=key[1],
+                max_daily_change_percent=key[2],
+                undercut_percent=undercut,
+                min_margin_percent=min_margin,
+            )
+        return strategy
 
-    async def _fetch_offers(self, marketplace_id: str, asins: list[str]) -> dict[str, list[CompetitorOffer]]:
-        offers: dict[str, list[CompetitorOffer]] = {asin: [] for asin in asins}
+    async def _fetch_offers(self, marketplace_id: str, asins: list[str]) -> dict[str, OfferSummary]:
+        # Only ASINs the API answered for; readers fall back to _NO_OFFERS.
+        offers: dict[str, OfferSummary] = {}
         response = await self.sp_api.get_competitive_pricing(marketplace_id, asins)
-        for entry in response.get("data", []):
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for entry in response.get("data", ()):
             asin = entry.get("asin") or entry.get("ASIN")
-            offer_list = []
-            for offer in entry.get("offers", []):
-                price_info = offer.get("listingPrice", {})
-                offer_list.append(
-                    CompetitorOffer(
-                        seller_id=offer.get("sellerId", "unknown"),
-                        price=float(price_info.get("amount", 0.0)),
-                        is_buy_box=offer.get("isBuyBoxWinner", False),
-                        fulfillment_type=offer.get("fulfillmentType", "UNKNOWN"),
-                    )
-                )
-            offers[asin] = offer_list
+            # Reduced while streaming: no per-offer objects for offers nobody looks at.
+            count = 0
+            best_price: float | None = None
+            best_seller: str | None = None
+            for offer in entry.get("offers", ()):
+                count += 1
+                if offer.get("isBuyBoxWinner", False):
+                    continue
+                price = float(offer.get("listingPrice", {}).get("amount", 0.0))
+                if best_price is None or price < best_price:
+                    best_price, best_seller = price, offer.get("sellerId", "unknown")
+            offers[asin] = OfferSummary(count, best_price, best_seller)
+            if debug:
+                logger.debug("Offers for %s: %s", asin, entry.get("offers", ()))
         return offers
 
+    async def _load_test_offers(
+        self, marketplace_code: str
+    ) -> tuple[dict[str, OfferSummary], dict[str, list[dict[str, Any]]]]:
+        """Summaries for pricing plus the offers serialized once for simulated events."""
+
+        summaries: dict[str, OfferSummary] = {}
+        payloads: dict[str, list[dict[str, Any]]] = {}
+        async for asin, offers in iter_competitor_offers(self.session, marketplace_code):
+            summaries[asin] = OfferSummary.from_offers(offers)
+            payloads[asin] = [
+                {
+                    "seller_id": offer.seller_id,
+                    "price": offer.price,
+                    "is_buy_box": offer.is_buy_box,
+                    "fulfillment_type": offer.fulfillment_type,
+                }
+                for offer in offers
+            ]
+        return summaries, payloads
 
     async def run_marketplace(
         self, marketplace_code: str, profile_id: int | None = None
     ) -> dict[str, Any]:
-
+        test_mode = await self._is_test_mode()
         run = RepricingRun(
-            started_at=datetime.utcnow(),
+            started_at=datetime.now(timezone.utc),
             marketplace_id=0,
             status="test-running" if test_mode else "running",
         )
@@ -276,128 +625,256 @@ class Repricer:
         run.marketplace_id = marketplace.id
         self.session.add(run)
         await self.session.flush()
-        skus = await self._fetch_skus(marketplace, profile_id=profile_id)
-        if not skus:
+        if not await self._has_skus(marketplace, profile_id):
             run.status = "empty"
             await self.session.commit()
             return result
 
-        if not self.ftp_loader.validate_freshness(marketplace_code):
-            await create_alert(
-                self.session,
-                f"FTP feed stale or missing for {marketplace_code}",
-                AlertSeverity.WARNING,
-            )
-        try:
-            floor_map = {record.sku: record for record in self.ftp_loader.load(marketplace_code)}
-        except FileNotFoundError:
-            await create_alert(
-                self.session,
-                f"FTP feed missing for {marketplace_code}",
-                AlertSeverity.CRITICAL,
-            )
-            run.status = "blocked"
-            await self.session.commit()
-            return result
+        alerts = AlertCollector()
+        test_offers: dict[str, OfferSummary] | None = None
+        offer_payloads: dict[str, list[dict[str, Any]]] = {}
+        if test_mode:
+            # Simulations run purely on uploaded datasets: no FTP feed, no SP-API calls.
+            floor_map = await load_floor_map(self.session, marketplace_code)
+            # Payloads are shared by every SKU event that references the ASIN.
+            test_offers, offer_payloads = await self._load_test_offers(marketplace_code)
+        else:
+            if not self.ftp_loader.validate_freshness(marketplace_code):
+                alerts.append(
+                    f"FTP feed stale or missing for {marketplace_code}", AlertSeverity.WARNING
+                )
+            try:
+                floor_map = self.ftp_loader.load_map(marketplace_code)
+            except FileNotFoundError:
+                # Nothing can be priced, so the run ends here with whatever was collected.
+                alerts.append(f"FTP feed missing for {marketplace_code}", AlertSeverity.CRITICAL)
+                await alerts.flush(self.session)
+                run.status = "blocked"
+                await self.session.commit()
+                return result
         batch_size = settings.repricing_batch_size
         concurrency = max(1, settings.repricing_concurrency)
-        strategy_cache: dict[int | None, PricingStrategy] = {None: self.strategy}
-        processed_profiles: set[int] = set()
-        for window_start in range(0, len(skus), batch_size * concurrency):
-            window = skus[window_start : window_start + batch_size * concurrency]
-            tasks: list[tuple[list[Sku], asyncio.Task[dict[str, list[CompetitorOffer]]]]] = []
-            for idx in range(0, len(window), batch_size):
-                batch = window[idx : idx + batch_size]
-                task = asyncio.create_task(
-                    self._fetch_offers(marketplace.amazon_id, [sku.asin for sku in batch])
+        # Profiles are loaded once per run, so each one resolves its strategy once
+        # instead of rebuilding the cache key for every batch.
+        strategies: dict[int | None, PricingStrategy] = {}
+        events: list[dict[str, Any]] = []
+        pending: list[PriceComputation] = []
+        fetch_slots = asyncio.Semaphore(concurrency)
+        # competitivePrice takes at most 20 ASINs per call; a SKU batch is split into
+        # requests of that size which all go out at once instead of one after another.
+        asins_per_request = max(1, settings.sp_api_pricing_batch_size)
+
+        # Each ASIN is requested once per run: SKUs that share it (variants, repeat
+        # listings) await the request already issued for it.
+        asin_requests: dict[str, asyncio.Task[dict[str, OfferSummary]]] = {}
+
+        async def fetch_asins(asins: list[str]) -> dict[str, OfferSummary]:
+            async with fetch_slots:
+                return await self._fetch_offers(marketplace.amazon_id, asins)
+
+        async def fetch(
+            batch: list[Sku],
+        ) -> tuple[list[Sku], dict[str, OfferSummary]]:
+            if test_offers is not None:
+                return batch, test_offers
+            asins = dict.fromkeys(sku.asin for sku in batch)
+            missing = [asin for asin in asins if asin not in asin_requests]
+            for start in range(0, len(missing), asins_per_request):
+                chunk = missing[start : start + asins_per_request]
+                request = asyncio.create_task(fetch_asins(chunk))
+                for asin in chunk:
+                    asin_requests[asin] = request
+            offers: dict[str, OfferSummary] = {}
+            for response in await asyncio.gather(
+                *{asin_requests[asin] for asin in asins}
+            ):
+                offers.update(response)
+            return batch, offers
+
+        def process(batch: list[Sku], offers: dict[str, OfferSummary]) -> None:
+            # One timestamp per batch; events within a batch are a few ms apart anyway.
+            now = datetime.now(timezone.utc)
+            groups: dict[
+                int | None, list[tuple[Sku, OfferSummary, FloorPrice]]
+            ] = {}
+            for sku in batch:
+                result["processed"] += 1
+                floor = floor_map.get(sku.sku)
+                if not floor:
+                    logger.warning("Missing floor price for %s", sku.sku)
+                    result["errors"] += 1
+                    alerts.append(
+                        f"Missing floor price for SKU {sku.sku}",
+                        AlertSeverity.WARNING,
+                        {"marketplace": marketplace_code},
+                    )
+                    continue
+                groups.setdefault(sku.profile_id, []).append(
+                    (sku, offers.get(sku.asin, _NO_OFFERS), floor)
                 )
-                tasks.append((batch, task))
-            for batch, task in tasks:
-                offers = await task
-                for sku in batch:
-                    result["processed"] += 1
-                    floor = floor_map.get(sku.sku)
-                    if not floor:
-                        logger.warning("Missing floor price for %s", sku.sku)
-                        result["errors"] += 1
-                        await create_alert(
-                            self.session,
-                            f"Missing floor price for SKU {sku.sku}",
-                            AlertSeverity.WARNING,
-                            {"marketplace": marketplace_code},
-                        )
+            for profile_key, items in groups.items():
+                strategy = strategies.get(profile_key)
+                if strategy is None:
+                    strategy = strategies[profile_key] = self._strategy_for_profile(
+                        items[0][0].profile
+                    )
+                # Simulations record every evaluated SKU, unchanged ones included; only
+                # live runs skip the steady-state SKUs.
+                computations = strategy.determine_prices(items, now=now, skip_noop=not test_mode)
+                for (sku, _, _), computation in zip(items, computations, strict=True):
+                    if computation.new_price is None:
                         continue
-                    profile_key = sku.profile_id
-                    strategy = strategy_cache.get(profile_key)
-                    if strategy is None:
-                        strategy = self._strategy_for_profile(sku.profile)
-                        strategy_cache[profile_key] = strategy
-                    computation = strategy.determine_price(sku, offers.get(sku.asin, []), floor)
-                    await self._apply_price(computation, marketplace)
-                    if computation.new_price is not None:
-                        result["updated"] += 1
-                    if profile_key is not None:
-                        processed_profiles.add(profile_key)
-
-        run.completed_at = datetime.utcnow()
+                    result["updated"] += 1
+                    if test_mode:
+                        events.append(
+                            self._simulated_event(
+                                computation, offer_payloads.get(sku.asin, []), now
+                            )
+                        )
+                    elif sku.last_updated_price != computation.new_price:
+                        pending.append(computation)
+
+        async def drain(tasks: set[asyncio.Task], keep: int) -> set[asyncio.Task]:
+            while len(tasks) > keep:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    process(*task.result())
+            return tasks
+
+        # SKUs are streamed off a server-side cursor and offer fetches start as soon as a
+        # batch is filled; at most two windows of batches are held in memory. The
+        # session is only touched from this coroutine, so alerts for missing floors are
+        # written once the cursor has been drained.
+        in_flight: set[asyncio.Task] = set()
+        try:
+            async for batch in self._stream_skus(marketplace, profile_id, batch_size):
+                in_flight.add(asyncio.create_task(fetch(batch)))
+                in_flight = await drain(in_flight, concurrency * 2)
+            in_flight = await drain(in_flight, 0)
+        finally:
+            for task in (*in_flight, *asin_requests.values()):
+                task.cancel()
+        if pending:
+            submitted = await self._submit_prices(marketplace, pending, alerts)
+            # Rejected submissions did not change anything on Amazon.
+            rejected = len(pending) - len(submitted)
+            result["updated"] -= rejected
+            result["errors"] += rejected
+            events.extend(submitted)
+        # Feed, missing-floor and submission alerts land in one INSERT once the cursor
+        # is closed; they are stamped with the run's completion time.
+        completed_at = datetime.now(timezone.utc)
+        await alerts.flush(self.session, created_at=completed_at)
+
+        if events:
+            # One executemany (batched into multi-row VALUES) instead of an INSERT per SKU.
+            await self.session.execute(insert(PriceEvent), events)
+        run.completed_at = completed_at
         run.status = "test-completed" if test_mode else "completed"
         run.processed = result["processed"]
         run.updated = result["updated"]
         run.errors = result["errors"]
         await self.session.commit()
+        processed_profiles = sorted(key for key in strategies if key is not None)
         if processed_profiles:
-            result["profiles_processed"] = sorted(processed_profiles)
+            result["profiles_processed"] = processed_profiles
         logger.info("Completed repricing %s: %s", marketplace_code, result)
         return result
 
-    async def _apply_price(
+    @staticmethod
+    def _event_row(computation: PriceComputation, now: datetime) -> dict[str, Any]:
+        sku = computation.sku
+        return {
+            "sku_id": sku.id,
+            "created_at": now,
+            "old_price": sku.last_updated_price,
+            "new_price": computation.new_price,
+            "old_business_price": sku.last_updated_business_price,
+            "new_business_price": computation.new_business_price,
+        }
+
+    def _simulated_event(
+        self, computation: PriceComputation, offers: list[dict[str, Any]], now: datetime
+    ) -> dict[str, Any]:
+        return self._event_row(computation, now) | {
+            "reason": "repricer-test",
+            "context": {
+                "mode": "test",
+                "offers": offers,
+                "computation": computation.context,
+            },
+        }
+
+    async def _submit_prices(
         self,
-        computation: PriceComputation,
         marketplace: Marketplace,
-        test_mode: bool,
-        offers: list[CompetitorOffer],
-    ) -> None:
-        sku = computation.sku
-        if computation.new_price is None:
-            return
-        if not test_mode and sku.last_updated_price == computation.new_price:
-            return
-        previous_price = sku.last_updated_price
-        previous_business_price = sku.last_updated_business_price
-        if test_mode:
-            event = PriceEvent(
-                sku_id=sku.id,
-                created_at=datetime.utcnow(),
-                old_price=previous_price,
-                new_price=computation.new_price,
-                old_business_price=previous_business_price,
-                new_business_price=computation.new_business_price,
-                reason="repricer-test",
-                context={
-                    "mode": "test",
-                    "offers": [asdict(offer) for offer in offers],
-                    "computation": computation.context,
-                },
-            )
-            self.session.add(event)
-            return
-        payload = await self.sp_api.submit_price_update(
-            marketplace.amazon_id,
-            sku.sku,
-            float(computation.new_price),
-            float(computation.new_business_price) if computation.new_business_price else None,
-        )
-        sku.last_updated_price = computation.new_price
-        sku.last_updated_business_price = computation.new_business_price
-        sku.last_price_update = datetime.utcnow()
-        event = PriceEvent(
-            sku_id=sku.id,
-            created_at=datetime.utcnow(),
-            old_price=previous_price,
-            new_price=computation.new_price,
-            old_business_price=previous_business_price,
-            new_business_price=computation.new_business_price,
-            reason="repricer",
-            context={"api": payload} | computation.context,
+        pending: list[PriceComputation],
+        alerts: AlertCollector,
+    ) -> list[dict[str, Any]]:
+        """Submit computed prices and return the events to record.
+
+        Each SKU goes out as its own Listings PATCH, up to ``repricing_concurrency`` at
+        a time. A SKU only takes the new price, and only gets an event, once Amazon has
+        accepted that submission; rejected ones are alerted on and picked up again by
+        the next run.
+        """
+
+        slots = asyncio.Semaphore(max(1, settings.repricing_concurrency))
+
+        async def submit(computation: PriceComputation) -> dict[str, Any]:
+            business = computation.new_business_price
+            async with slots:
+                return await self.sp_api.submit_price_update(
+                    marketplace.amazon_id,
+                    computation.sku.sku,
+                    float(computation.new_price),
+                    float(business) if business else None,
+                )
+
+        responses = await asyncio.gather(
+            *(submit(computation) for computation in pending), return_exceptions=True
         )
-        self.session.add(event)
+        events: list[dict[str, Any]] = []
+        sku_rows: list[dict[str, Any]] = []
+        failed: list[str] = []
+        now = datetime.now(timezone.utc)
+        for computation, payload in zip(pending, responses, strict=True):
+            if isinstance(payload, BaseException):
+                logger.error(
+                    "Price submission failed for %s in %s: %s",
+                    computation.sku.sku,
+                    marketplace.code,
+                    payload,
+                )
+                failed.append(computation.sku.sku)
+                continue
+            event = self._event_row(computation, now) | {
+                "reason": "repricer",
+                "context": {"api": payload} | computation.context,
+            }
+            sku = computation.sku
+            business = computation.new_business_price
+            row = {
+                "last_updated_price_cents": int(computation.new_price.scaleb(2)),
+                "last_updated_business_price_cents": (
+                    int(business.scaleb(2)) if business is not None else None
+                ),
+                "last_price_update": now,
+            }
+            # The UPDATE below is issued directly, so the loaded instances are given the
+            # same values as already-persisted state instead of being dirtied.
+            for key, value in row.items():
+                set_committed_value(sku, key, value)
+            sku_rows.append({"id": sku.id} | row)
+            events.append(event)
+        if failed:
+            alerts.append(
+                f"Price submission failed for {len(failed)} SKUs in {marketplace.code}",
+                AlertSeverity.CRITICAL,
+                {"skus": failed[:_FAILED_SKUS_IN_ALERT]},
+            )
+        if sku_rows:
+            # ORM bulk UPDATE by primary key: one executemany instead of a unit-of-work
+            # flush that diffs every SKU instance.
+            await self.session.execute(update(Sku), sku_rows)
+        return events
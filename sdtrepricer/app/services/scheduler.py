@@ -3,8 +3,8 @@
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from sqlalchemy import select
@@ -15,22 +15,58 @@ from ..core.logging import logger
 from ..models import Marketplace, RepricingProfile, Sku
 from .ftp_loader import FTPFeedLoader
 from .repricer import Repricer
-from .sp_api import create_sp_api_client
+from .sp_api import SPAPIClient, create_sp_api_client
+
+# One row per (marketplace, profile) with profiled SKUs, plus a NULL-profile row for
+# marketplaces with unprofiled or no SKUs. Built once at import.
+_SCHEDULE_STMT = (
+    select(
+        Marketplace.id,
+        Marketplace.code,
+        RepricingProfile.id,
+        RepricingProfile.frequency_minutes,
+    )
+    .select_from(Marketplace)
+    .outerjoin(Sku, Sku.marketplace_id == Marketplace.id)
+    .outerjoin(RepricingProfile, Sku.profile_id == RepricingProfile.id)
+    .distinct()
+    .order_by(Marketplace.id)
+)
+# Scheduled triggers enqueued between cooperative yields to the event loop.
+SCHEDULE_DISPATCH_BATCH = 64
 
 
 class RepricingScheduler:
     """Coordinate event-driven repricing and scheduled fallbacks."""
 
     def __init__(self) -> None:
-        self.queue: asyncio.Queue[tuple[str, dict[str, Any]]] = asyncio.Queue()
+        self.queue: asyncio.Queue[tuple[str, dict[str, Any]]] = asyncio.Queue(
+            maxsize=max(1, settings.scheduler_queue_max)
+        )
+        # (marketplace_code, profile_id) pairs already queued: a repeat trigger before
+        # the run starts is coalesced, so the queue holds at most one entry per key.
+        self._pending: set[tuple[str, int | None]] = set()
+        # (loaded_at, {marketplace_code: [(profile_id, frequency_minutes)]}): the plan
+        # only changes with profile edits or assignments, which call invalidate_schedule.
+        self._schedule_cache: tuple[float, dict[str, list[tuple[int, timedelta]]]] | None = None
+        # Per-marketplace leaky bucket for notifications: (tokens, last_refill).
+        self._notification_buckets: dict[str, tuple[float, float]] = {}
         self._task: asyncio.Task | None = None
         self._stop_event = asyncio.Event()
         self.last_runs: dict[str, datetime] = {}
-        self.stats: dict[str, dict[str, Any]] = defaultdict(dict)
+        self.stats: dict[str, dict[str, Any]] = {}
+        self.tick_id = 0
+        # Shared across runs so the parsed-feed cache survives between ticks.
+        self.ftp_loader = FTPFeedLoader()
+        # One client for the scheduler's lifetime: its connection pool, token and
+        # throttle state carry over between runs instead of starting cold each time.
+        self.sp_api_client: SPAPIClient | None = None
 
     async def start(self) -> None:
         if self._task is None or self._task.done():
             self._stop_event.clear()
+            if self.sp_api_client is None:
+                self.sp_api_client = await create_sp_api_client()
             self._task = asyncio.create_task(self._run_loop())
             logger.info("Scheduler started")
 
@@ -39,6 +75,9 @@ class RepricingScheduler:
         if self._task:
             await self._task
             logger.info("Scheduler stopped")
+        if self.sp_api_client is not None:
+            await self.sp_api_client.close()
+            self.sp_api_client = None
 
     def _key(self, marketplace_code: str, profile_id: int | None) -> str:
         suffix = str(profile_id) if profile_id is not None else "all"
@@ -47,31 +86,100 @@ class RepricingScheduler:
     async def trigger_marketplace(
         self, marketplace_code: str, reason: str = "manual", profile_id: int | None = None
     ) -> None:
-        await self.queue.put(
-            (
-                "repricer",
-                {"marketplace_code": marketplace_code, "reason": reason, "profile_id": profile_id},
+        key = (marketplace_code, profile_id)
+        if key in self._pending:
+            logger.debug("Repricing for %s already queued; coalescing %s trigger", key, reason)
+            return
+        try:
+            self.queue.put_nowait(
+                (
+                    "repricer",
+                    {
+                        "marketplace_code": marketplace_code,
+                        "reason": reason,
+                        "profile_id": profile_id,
+                    },
+                )
             )
+        except asyncio.QueueFull:
+            logger.warning("Scheduler queue full; dropping %s trigger for %s", reason, key)
+            return
+        self._pending.add(key)
+
+    def _admit_notification(self, marketplace_code: str) -> bool:
+        """Leaky bucket: ``scheduler_notification_burst`` runs, refilled one per tick."""
+
+        burst = float(max(1, settings.scheduler_notification_burst))
+        now = time.monotonic()
+        tokens, last_refill = self._notification_buckets.get(marketplace_code, (burst, now))
+        tokens = min(burst, tokens + (now - last_refill) / settings.scheduler_tick_seconds)
+        admitted = tokens >= 1.0
+        self._notification_buckets[marketplace_code] = (
+            tokens - 1.0 if admitted else tokens,
+            now,
         )
+        return admitted
 
     async def handle_notification(self, payload: dict[str, Any]) -> None:
         marketplace_code = payload.get("marketplace_code")
-        if marketplace_code:
-            await self.trigger_marketplace(marketplace_code, reason="notification")
+        if not marketplace_code:
+            return
+        if (marketplace_code, None) in self._pending:
+            # Coalesced into the queued run without spending a token.
+            return
+        if not self._admit_notification(marketplace_code):
+            logger.info("Notification rate exceeded for %s; dropping trigger", marketplace_code)
+            return
+        await self.trigger_marketplace(marketplace_code, reason="notification")
 
     async def _run_loop(self) -> None:
         while not self._stop_event.is_set():
             try:
-                item_type, data = await asyncio.wait_for(
+                item = await asyncio.wait_for(
                     self.queue.get(), timeout=settings.scheduler_tick_seconds
                 )
-                if item_type == "repricer":
-                    await self._handle_reprice_request(data)
+                await self._drain_queue(item)
             except asyncio.TimeoutError:
                 await self._run_scheduled_cycle()
             except Exception as exc:  # pragma: no cover - defensive guard
                 logger.exception("Scheduler loop error: %s", exc)
 
+    async def _drain_queue(self, first: tuple[str, dict[str, Any]]) -> None:
+        """Handle ``first`` plus everything already queued behind it as one burst.
+
+        Requests are deduplicated per marketplace (a whole-marketplace run covers any
+        profile-specific one). Different marketplaces run concurrently; runs for the
+        same marketplace stay sequential so they never reprice the same SKUs at once.
+        """
+
+        items = [first]
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        requests: dict[str, dict[int | None, dict[str, Any]]] = {}
+        for item_type, data in items:
+            if item_type != "repricer":
+                continue
+            # Handling starts now, so a new trigger for this key queues a fresh run.
+            self._pending.discard((data["marketplace_code"], data.get("profile_id")))
+            by_profile = requests.setdefault(data["marketplace_code"], {})
+            by_profile.setdefault(data.get("profile_id"), data)
+        await asyncio.gather(
+            *(self._run_marketplace_requests(by_profile) for by_profile in requests.values())
+        )
+
+    async def _run_marketplace_requests(
+        self, by_profile: dict[int | None, dict[str, Any]]
+    ) -> None:
+        whole = by_profile.get(None)
+        for data in [whole] if whole is not None else by_profile.values():
+            try:
+                await self._handle_reprice_request(data)
+            except Exception as exc:  # pragma: no cover - defensive guard
+                logger.exception("Repricing %s failed: %s", data["marketplace_code"], exc)
+
     async def _handle_reprice_request(self, data: dict[str, Any]) -> None:
         marketplace_code = data["marketplace_code"]
         profile_id = data.get("profile_id")
@@ -81,59 +189,63 @@ class RepricingScheduler:
             profile_id,
             data.get("reason"),
         )
+        if self.sp_api_client is None:
+            self.sp_api_client = await create_sp_api_client()
         async with get_session() as session:
-            sp_api_client = await create_sp_api_client()
-            try:
-                ftp_loader = FTPFeedLoader()
-                repricer = Repricer(session, sp_api_client, ftp_loader)
-                result = await repricer.run_marketplace(marketplace_code, profile_id=profile_id)
-                key = self._key(marketplace_code, profile_id)
-                self.stats[key] = result
-                now = datetime.utcnow()
-                processed_profiles = set(result.get("profiles_processed", []))
-                if profile_id is not None:
-                    processed_profiles.add(profile_id)
-                for processed in processed_profiles:
-                    self.last_runs[self._key(marketplace_code, processed)] = now
-                self.last_runs[key] = now
-            finally:
-                await sp_api_client.close()
+            repricer = Repricer(session, self.sp_api_client, self.ftp_loader)
+            result = await repricer.run_marketplace(marketplace_code, profile_id=profile_id)
+            key = self._key(marketplace_code, profile_id)
+            self.stats[key] = result
+            now = datetime.now(timezone.utc)
+            processed_profiles = set(result.get("profiles_processed", []))
+            if profile_id is not None:
+                processed_profiles.add(profile_id)
+            for processed in processed_profiles:
+                self.last_runs[self._key(marketplace_code, processed)] = now
+            self.last_runs[key] = now
+            self.tick_id += 1
 
-    async def _run_scheduled_cycle(self) -> None:
+    def invalidate_schedule(self) -> None:
+        """Drop the cached dispatch plan so the next cycle re-reads it."""
+
+        self._schedule_cache = None
+
+    async def _load_schedule(self) -> dict[str, list[tuple[int, timedelta]]]:
+        cached = self._schedule_cache
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < settings.schedule_cache_ttl_seconds:
+            return cached[1]
         async with get_session() as session:
-            marketplaces = (await session.scalars(select(Marketplace))).all()
-            profile_rows = (
-                await session.execute(
-                    select(
-                        Marketplace.code,
-                        RepricingProfile.id,
-                        RepricingProfile.frequency_minutes,
-                    )
-                    .join(Sku, Sku.marketplace_id == Marketplace.id)
-                    .join(RepricingProfile, Sku.profile_id == RepricingProfile.id)
-                    .distinct()
-                )
-            ).all()
-        profiles_by_marketplace: dict[str, list[tuple[int, int]]] = defaultdict(list)
-        for code, profile_id, frequency in profile_rows:
-            profiles_by_marketplace[code].append((profile_id, frequency))
-        for marketplace in marketplaces:
-            profiles = profiles_by_marketplace.get(marketplace.code)
+            rows = (await session.execute(_SCHEDULE_STMT)).all()
+        # Every marketplace appears at least once (profile columns NULL when it has no
+        # profiled SKUs), so one pass yields both the marketplace list and its profiles.
+        profiles_by_marketplace: dict[str, list[tuple[int, timedelta]]] = {}
+        for _, code, profile_id, frequency in rows:
+            profiles = profiles_by_marketplace.setdefault(code, [])
+            if profile_id is not None:
+                profiles.append((profile_id, timedelta(minutes=frequency)))
+        self._schedule_cache = (now, profiles_by_marketplace)
+        return profiles_by_marketplace
+
+    async def _run_scheduled_cycle(self) -> None:
+        profiles_by_marketplace = await self._load_schedule()
+        # One clock read per cycle; every due check compares against this snapshot.
+        now = datetime.now(timezone.utc)
+        tick = timedelta(seconds=settings.scheduler_tick_seconds)
+        due: list[tuple[str, int | None]] = []
+        for code, profiles in profiles_by_marketplace.items():
             if not profiles:
-                key = self._key(marketplace.code, None)
-                last_run = self.last_runs.get(key)
-                if last_run and (
-                    datetime.utcnow() - last_run
-                ).total_seconds() < settings.scheduler_tick_seconds:
-                    continue
-                await self.trigger_marketplace(marketplace.code, reason="scheduled")
+                last_run = self.last_runs.get(self._key(code, None))
+                if not last_run or now - last_run >= tick:
+                    due.append((code, None))
                 continue
-            for profile_id, frequency in profiles:
-                key = self._key(marketplace.code, profile_id)
-                last_run = self.last_runs.get(key)
-                interval = timedelta(minutes=frequency)
-                if last_run and datetime.utcnow() - last_run < interval:
-                    continue
-                await self.trigger_marketplace(
-                    marketplace.code, reason="scheduled", profile_id=profile_id
-                )
+            for profile_id, interval in profiles:
+                last_run = self.last_runs.get(self._key(code, profile_id))
+                if not last_run or now - last_run >= interval:
+                    due.append((code, profile_id))
+        # Enqueueing never blocks, so a large plan would otherwise run start to finish
+        # without yielding; hand the loop back to request handlers between batches.
+        for index, (code, profile_id) in enumerate(due, start=1):
+            await self.trigger_marketplace(code, reason="scheduled", profile_id=profile_id)
+            if index % SCHEDULE_DISPATCH_BATCH == 0:
+                await asyncio.sleep(0)
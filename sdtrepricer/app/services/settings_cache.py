@@ -0,0 +1,60 @@
+"""In-process cache of the ``system_settings`` table."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..models import SystemSetting
+
+_ALL_SETTINGS_STMT = select(SystemSetting)
+
+
+def cached_settings(app: FastAPI) -> dict[str, str] | None:
+    """Return the cached key/value map, or ``None`` when it must be (re)loaded.
+
+    Writes through ``update_settings`` replace the map immediately; the TTL only bounds
+    how long another worker process can serve values it did not write itself.
+    """
+
+    cache = getattr(app.state, "settings_cache", None)
+    if cache is None:
+        return None
+    loaded_at = getattr(app.state, "settings_cache_loaded_at", 0.0)
+    if time.monotonic() - loaded_at >= settings.scheduler_tick_seconds:
+        return None
+    return cache
+
+
+async def get_settings_map(app: FastAPI, session: AsyncSession) -> dict[str, str]:
+    """Return all system settings, querying the database only on a cache miss."""
+
+    cache = cached_settings(app)
+    if cache is not None:
+        return cache
+    lock = getattr(app.state, "settings_cache_lock", None)
+    if lock is None:
+        lock = app.state.settings_cache_lock = asyncio.Lock()
+    async with lock:
+        cache = cached_settings(app)
+        if cache is None:
+            rows = (await session.execute(_ALL_SETTINGS_STMT)).scalars().all()
+            cache = {row.key: row.value for row in rows}
+            replace_settings_cache(app, cache)
+    return cache
+
+
+def replace_settings_cache(app: FastAPI, values: dict[str, str]) -> None:
+    """Atomically swap in a new settings map after it has been persisted."""
+
+    app.state.settings_cache = values
+    app.state.settings_cache_loaded_at = time.monotonic()
+    app.state.settings_cache_version = getattr(app.state, "settings_cache_version", 0) + 1
+
+
+__all__ = ["cached_settings", "get_settings_map", "replace_settings_cache"]
@@ -4,21 +4,44 @@ from __future__ import annotations
 
 import asyncio
 import time
-from collections import deque
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, BinaryIO
 
 import httpx
-from tenacity import AsyncRetrying, RetryError, retry_if_exception_type, stop_after_attempt, wait_exponential
+import orjson
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 from ..core.config import settings
 from ..core.logging import logger
 
+try:
+    import h2  # noqa: F401
+except ImportError:  # pragma: no cover - h2 is an optional extra
+    _HTTP2 = False
+else:
+    _HTTP2 = True
+
+# Concurrent chunk requests multiplex over a few long-lived connections instead of
+# each paying a TLS handshake on a cold socket.
+_HTTP_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0
+)
+
+
+def _decode(response: httpx.Response, default: dict[str, Any]) -> dict[str, Any]:
+    # orjson parses the raw bytes directly; httpx's .json() decodes to str and goes
+    # through the stdlib parser.
+    return orjson.loads(response.content) if response.content else default
+
 
 class RateLimitError(Exception):
     """Raised when API throttle occurs."""
 
 
+class ListingsSubmissionError(Exception):
+    """Raised when the Listings API answers a submission with ``INVALID``."""
+
+
 @dataclass
 class RateQuota:
     """Track Amazon SP-API rate quotas."""
@@ -28,6 +51,14 @@ class RateQuota:
     restore_rate: float
 
 
+@dataclass(slots=True)
+class _Bucket:
+    """Token-bucket state for one ``(operation, marketplace)`` quota."""
+
+    tokens: float
+    last_refill: float
+
+
 class TokenRefresher:
     """Handle refreshing LWA tokens."""
 
@@ -35,17 +66,43 @@ class TokenRefresher:
         self._token: str | None = None
         self._expires_at: float = 0.0
         self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task[None] | None = None
 
     async def get_token(self) -> str:
+        # Hot path: a valid token is read without touching the lock, so concurrent
+        # requests do not serialize on it. Only a miss takes the lock and re-checks.
+        token = self._token
+        if token and time.monotonic() < self._expires_at - 60:
+            return token
         async with self._lock:
-            now = time.monotonic()
-            if self._token and now < self._expires_at - 60:
-                return self._token
-            # Placeholder token refresh logic - integrate with LWA in production
-            self._token = "mock-token"
-            self._expires_at = now + 3600
-            logger.debug("Refreshed LWA token")
-            return self._token
+            token = self._token
+            if token and time.monotonic() < self._expires_at - 60:
+                return token
+            token = await self._refresh()
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh_ahead())
+            return token
+
+    async def _refresh(self) -> str:
+        # Placeholder token refresh logic - integrate with LWA in production
+        self._token = "mock-token"  # noqa: S105 - placeholder until LWA is wired in
+        self._expires_at = time.monotonic() + 3600
+        logger.debug("Refreshed LWA token")
+        return self._token
+
+    async def _refresh_ahead(self) -> None:
+        """Renew the token five minutes before expiry, off the request path."""
+
+        while True:
+            await asyncio.sleep(max(self._expires_at - 300 - time.monotonic(), 0.0))
+            async with self._lock:
+                if time.monotonic() >= self._expires_at - 300:
+                    await self._refresh()
+
+    def close(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
 
 
 class SPAPIClient:
@@ -53,26 +110,51 @@ class SPAPIClient:
 
     def __init__(self, http_client: httpx.AsyncClient | None = None) -> None:
         self._token_refresher = TokenRefresher()
-        self._client = http_client or httpx.AsyncClient(timeout=30.0)
-        self._request_log: deque[float] = deque(maxlen=1000)
+        self._client = http_client or httpx.AsyncClient(
+            timeout=30.0, http2=_HTTP2, limits=_HTTP_LIMITS
+        )
         self._quota = RateQuota(rate=0.1, burst=1, restore_rate=0.1)
-        self._lock = asyncio.Lock()
+        # Token buckets, one per (operation, marketplace) as Amazon meters them: each is
+        # refilled at ``rate`` per second up to ``burst``. A request may drive its bucket
+        # negative, which reserves its slot and tells it how long to wait.
+        self._buckets: dict[tuple[str, str], _Bucket] = {}
+        # Competitive-pricing coalescing: ASINs requested within a short window share
+        # one HTTP call per marketplace, each caller awaiting its own ASINs' futures.
+        self._pricing_futures: dict[tuple[str, str], asyncio.Future[dict[str, Any] | None]] = {}
+        self._pricing_queues: dict[str, list[str]] = {}
+        self._pricing_timers: dict[str, asyncio.TimerHandle] = {}
+        self._pricing_tasks: set[asyncio.Task[None]] = set()
 
     async def close(self) -> None:
+        for timer in self._pricing_timers.values():
+            timer.cancel()
+        for task in self._pricing_tasks:
+            task.cancel()
+        self._token_refresher.close()
         await self._client.aclose()
 
-    async def _throttle(self) -> None:
-        async with self._lock:
-            now = time.monotonic()
-            if self._request_log and len(self._request_log) >= self._quota.burst:
-                oldest = self._request_log[0]
-                delay = max(0.0, (1 / self._quota.rate) - (now - oldest))
-                if delay > 0:
-                    logger.debug("Throttling for %s seconds", delay)
-                    await asyncio.sleep(delay)
-            self._request_log.append(now)
-
-    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    async def _throttle(self, operation: str, marketplace_id: str) -> None:
+        # Refill and reservation never await, so they are atomic on the event loop;
+        # callers only sleep for their own reserved slot, never while holding a lock.
+        now = time.monotonic()
+        bucket = self._buckets.get((operation, marketplace_id))
+        if bucket is None:
+            bucket = self._buckets[(operation, marketplace_id)] = _Bucket(
+                float(self._quota.burst), now
+            )
+        bucket.tokens = min(
+            float(self._quota.burst), bucket.tokens + (now - bucket.last_refill) * self._quota.rate
+        )
+        bucket.last_refill = now
+        bucket.tokens -= 1.0
+        if bucket.tokens < 0:
+            delay = -bucket.tokens / self._quota.rate
+            logger.debug("Throttling %s for %s seconds", operation, delay)
+            await asyncio.sleep(delay)
+
+    async def _request(
+        self, method: str, url: str, operation: str, marketplace_id: str = "", **kwargs: Any
+    ) -> httpx.Response:
         token = await self._token_refresher.get_token()
         headers = kwargs.pop("headers", {})
         headers["Authorization"] = f"Bearer {token}"
@@ -86,7 +168,7 @@ class SPAPIClient:
             reraise=True,
         ):
             with attempt:
-                await self._throttle()
+                await self._throttle(operation, marketplace_id)
                 response = await self._client.request(method, url, **kwargs)
                 if response.status_code == 429:
                     raise RateLimitError("API throttled")
@@ -95,18 +177,75 @@ class SPAPIClient:
         raise RuntimeError("Unreachable")
 
     async def get_competitive_pricing(self, marketplace_id: str, asins: list[str]) -> dict[str, Any]:
-        """Fetch competitive pricing data for a list of ASINs."""
+        """Fetch competitive pricing data for a list of ASINs.
+
+        Requests are coalesced: ASINs from concurrent callers are sent together, up to
+        ``sp_api_pricing_batch_size`` per call or whatever has queued after
+        ``sp_api_pricing_batch_window_ms``. Each caller gets back only its own entries.
+        """
 
+        loop = asyncio.get_running_loop()
+        batch_max = max(1, settings.sp_api_pricing_batch_size)
+        futures = []
+        for asin in dict.fromkeys(asins):
+            future = self._pricing_futures.get((marketplace_id, asin))
+            if future is None:
+                future = self._pricing_futures[(marketplace_id, asin)] = loop.create_future()
+                queue = self._pricing_queues.setdefault(marketplace_id, [])
+                queue.append(asin)
+                if len(queue) >= batch_max:
+                    self._flush_pricing(marketplace_id)
+            futures.append(future)
+        if self._pricing_queues.get(marketplace_id) and marketplace_id not in self._pricing_timers:
+            self._pricing_timers[marketplace_id] = loop.call_later(
+                settings.sp_api_pricing_batch_window_ms / 1000,
+                self._flush_pricing,
+                marketplace_id,
+            )
+        # Shielded: a cancelled caller must not cancel futures other callers share.
+        entries = await asyncio.gather(*(asyncio.shield(future) for future in futures))
+        return {"data": [entry for entry in entries if entry is not None]}
+
+    def _flush_pricing(self, marketplace_id: str) -> None:
+        timer = self._pricing_timers.pop(marketplace_id, None)
+        if timer is not None:
+            timer.cancel()
+        asins = self._pricing_queues.pop(marketplace_id, None)
+        if not asins:
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._fetch_competitive_pricing(marketplace_id, asins)
+        )
+        self._pricing_tasks.add(task)
+        task.add_done_callback(self._pricing_tasks.discard)
+
+    async def _fetch_competitive_pricing(self, marketplace_id: str, asins: list[str]) -> None:
+        futures = [self._pricing_futures.pop((marketplace_id, asin)) for asin in asins]
         endpoint = f"{settings.sp_api_endpoint}/products/pricing/v0/competitivePrice"
         params = {"MarketplaceId": marketplace_id, "Asins": ",".join(asins)}
         try:
-            response = await self._request("GET", endpoint, params=params)
-        except RetryError as exc:  # pragma: no cover - defensive guard
-            logger.error("Failed to fetch pricing for %s: %s", asins, exc)
+            response = await self._request(
+                "GET", endpoint, "getCompetitivePricing", marketplace_id, params=params
+            )
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
             raise
+        except Exception as exc:
+            logger.error("Failed to fetch pricing for %s: %s", asins, exc)
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+                    # Mark it retrieved: a caller that was cancelled meanwhile never reads
+                    # it, and asyncio would log it as unhandled. Live callers still get it.
+                    future.exception()
+            return
         # In test environment we emulate expected structure
-        payload = response.json() if response.content else {"data": []}
-        return payload
+        payload = _decode(response, {"data": []})
+        by_asin = {entry.get("asin") or entry.get("ASIN"): entry for entry in payload.get("data", ())}
+        for asin, future in zip(asins, futures, strict=True):
+            if not future.done():
+                future.set_result(by_asin.get(asin))
 
     async def submit_price_update(
         self,
@@ -115,9 +254,13 @@ class SPAPIClient:
         price: float,
         business_price: float | None,
     ) -> dict[str, Any]:
-        """Submit price update to Listings API."""
+        """Submit price update to Listings API.
+
+        Raises :class:`ListingsSubmissionError` when Amazon answers ``INVALID``.
+        """
 
-        endpoint = f"{settings.sp_api_endpoint}/listings/2021-08-01/items/{settings.sp_api_client_id or 'seller'}/{sku}/price"
+        seller_id = settings.sp_api_seller_id or "seller"
+        endpoint = f"{settings.sp_api_endpoint}/listings/2021-08-01/items/{seller_id}/{sku}/price"
         body = {
             "MarketplaceId": marketplace_id,
             "PriceType": "B2B" if business_price else "B2C",
@@ -125,22 +268,35 @@ class SPAPIClient:
         }
         if business_price is not None:
             body["BusinessPrice"] = business_price
-        response = await self._request("PATCH", endpoint, json=body)
-        return response.json() if response.content else {"status": "submitted"}
+        response = await self._request(
+            "PATCH", endpoint, "patchListingsItem", marketplace_id, json=body
+        )
+        payload = _decode(response, {"status": "submitted"})
+        # A 200 still carries the verdict: INVALID means the price was not applied.
+        if payload.get("status") == "INVALID":
+            raise ListingsSubmissionError(f"{sku} rejected: {payload.get('issues', [])}")
+        return payload
+
+    async def submit_bulk_feed(
+        self, document: bytes | BinaryIO, content_type: str
+    ) -> dict[str, Any]:
+        """Upload a bulk pricing feed.
 
-    async def submit_bulk_feed(self, document: bytes, content_type: str) -> dict[str, Any]:
-        """Upload a bulk pricing feed."""
+        ``document`` may be a seekable binary file, which httpx streams into the
+        multipart body in chunks instead of it being read into memory first. httpx
+        rewinds it before every attempt, so a retried upload resends the whole feed.
+        """
 
         endpoint = f"{settings.sp_api_endpoint}/feeds/2021-06-30/documents"
         files = {"file": ("bulk.xml", document, content_type)}
-        response = await self._request("POST", endpoint, files=files)
-        return response.json() if response.content else {"feedDocumentId": "mock"}
+        response = await self._request("POST", endpoint, "createFeedDocument", files=files)
+        return _decode(response, {"feedDocumentId": "mock"})
 
     async def acknowledge_notification(self, notification_id: str) -> None:
         """Acknowledge SP-API notification."""
 
         endpoint = f"{settings.sp_api_endpoint}/notifications/v1/acknowledgements/{notification_id}"
-        await self._request("POST", endpoint)
+        await self._request("POST", endpoint, "acknowledgeNotification")
 
 
 async def create_sp_api_client() -> SPAPIClient:
@@ -2,17 +2,38 @@
 
 from __future__ import annotations
 
+import codecs
 import csv
-from collections import defaultdict
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 from decimal import Decimal
-from io import StringIO
+from typing import Any
 
-from sqlalchemy import delete, select
+from fastapi import UploadFile
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import TestCompetitorOffer, TestFloorPrice
-from .ftp_loader import FloorPriceRecord
+from .ftp_loader import FloorPrice, FloorPriceRecord
+
+# Upload rows bypass the ORM unit of work: PostgreSQL receives them through one
+# ``COPY``, other backends as one executemany INSERT per block of this size.
+INGEST_BATCH_SIZE = 1000
+# Bytes awaited from an upload per read.
+UPLOAD_READ_SIZE = 1 << 16
+# Column order of the tuples the ingest functions produce.
+_FLOOR_COLUMNS = ("marketplace_code", "sku", "asin", "min_price", "min_business_price")
+_OFFER_INGEST_COLUMNS = (
+    "marketplace_code",
+    "asin",
+    "seller_id",
+    "price",
+    "is_buy_box",
+    "fulfillment_type",
+)
+_REQUIRED_FLOOR_COLUMNS = frozenset({"SKU", "ASIN", "MIN_PRICE"})
+_REQUIRED_OFFER_COLUMNS = frozenset({"ASIN", "SELLER_ID", "PRICE"})
+_TRUE_VALUES = frozenset({"1", "true", "yes", "y"})
 
 
 @dataclass
@@ -26,101 +47,227 @@ class UploadedCompetitorOffer:
     fulfillment_type: str
 
 
-def _decode_csv(content: bytes) -> csv.DictReader:
+class _Lines:
+    """Line source for :func:`csv.reader` that notes when it ran dry mid-record."""
+
+    __slots__ = ("lines", "pos", "starved")
+
+    def __init__(self, lines: list[str]) -> None:
+        self.lines = lines
+        self.pos = 0
+        self.starved = False
+
+    def __iter__(self) -> _Lines:
+        return self
+
+    def __next__(self) -> str:
+        if self.pos == len(self.lines):
+            self.starved = True
+            raise StopIteration
+        self.pos += 1
+        return self.lines[self.pos - 1]
+
+
+async def _read_lines(content: bytes | UploadFile) -> AsyncIterator[tuple[list[str], bool]]:
+    """Decode ``content`` as UTF-8 and yield ``(lines, final)`` one read at a time.
+
+    Uploads are awaited in ``UPLOAD_READ_SIZE`` chunks. Lines keep their terminator
+    and, as with ``newline=""``, only ``\\n``, ``\\r\\n`` and ``\\r`` end one, so
+    other Unicode breaks stay inside their cell. The final block also carries whatever
+    follows the last terminator.
+    """
+
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    final = False
+    while not final:
+        if isinstance(content, bytes):
+            chunk, final = content, True
+        else:
+            chunk = await content.read(UPLOAD_READ_SIZE)
+            final = not chunk
+        try:
+            text = tail + decoder.decode(chunk, final=final)
+        except UnicodeDecodeError as exc:
+            raise ValueError("Unable to decode file as UTF-8") from exc
+        lines: list[str] = []
+        tail = ""
+        for part in text.splitlines(keepends=True):
+            tail += part
+            if tail.endswith(("\n", "\r")):
+                lines.append(tail)
+                tail = ""
+        if final:
+            if tail:
+                lines.append(tail)
+        elif not tail and lines and lines[-1].endswith("\r"):
+            # May be the first half of a "\r\n" split across two reads.
+            tail = lines.pop()
+        yield lines, final
+
+
+async def _read_rows(content: bytes | UploadFile) -> AsyncIterator[list[str]]:
+    """Yield the CSV rows of ``content`` as it is read.
+
+    Each block is parsed by a fresh reader that starts at the first record not yet
+    emitted, so a quoted cell spanning two reads is only parsed once all of it has
+    arrived.
+    """
+
+    pending: list[str] = []
+    async for block, final in _read_lines(content):
+        pending += block
+        lines = _Lines(pending)
+        start = 0
+        for row in csv.reader(lines):
+            if lines.starved and not final:
+                break
+            yield row
+            start = lines.pos
+        del pending[:start]
+
+
+async def _decode_csv(
+    content: bytes | UploadFile, required: frozenset[str], optional: tuple[str, ...]
+) -> tuple[dict[str, int], AsyncIterator[list[str]]]:
+    """Open raw CSV bytes or an upload as a lazily decoding row reader.
+
+    Uploads are read and decoded chunk by chunk, so the payload is never held in
+    memory as one ``bytes`` plus one ``str`` copy. Returns the column positions for
+    ``required`` and ``optional`` plus plain list rows, padded so every position can be
+    indexed; optional columns absent from the header map past its end and always read
+    as ``""``.
+    """
+
+    reader = _read_rows(content)
     try:
-        text = content.decode("utf-8-sig")
-    except UnicodeDecodeError as exc:  # pragma: no cover - defensive guard
-        raise ValueError("Unable to decode file as UTF-8") from exc
-    stream = StringIO(text)
-    reader = csv.DictReader(stream)
-    if reader.fieldnames is None:
-        raise ValueError("CSV file is missing headers")
-    return reader
+        header = await anext(reader)
+    except StopAsyncIteration:
+        raise ValueError("CSV file is missing headers") from None
+    if missing := required.difference(header):
+        raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+    # Later duplicates win, as they did with DictReader.
+    columns = {name: index for index, name in enumerate(header)}
+    positions = {name: columns[name] for name in required}
+    width = len(header)
+    for name in optional:
+        if name in columns:
+            positions[name] = columns[name]
+        else:
+            positions[name] = width
+            width += 1
+
+    size = len(header)
+
+    async def rows() -> AsyncIterator[list[str]]:
+        async for row in reader:
+            # With absent optional columns, cells beyond the header are dropped so they
+            # never alias those positions.
+            if len(row) < size or width > size:
+                row = row[:size] + [""] * (width - min(len(row), size))
+            yield row
+
+    return positions, rows()
+
+
+async def _write_rows(
+    session: AsyncSession,
+    model: type[TestFloorPrice | TestCompetitorOffer],
+    columns: tuple[str, ...],
+    records: AsyncIterator[tuple[Any, ...]],
+) -> int:
+    """Write ``records`` (tuples in ``columns`` order) into ``model``'s table.
+
+    On PostgreSQL the rows go through asyncpg's binary ``COPY`` inside the session's
+    transaction; elsewhere they are flushed as one executemany INSERT per block.
+    """
+
+    if session.bind.dialect.name == "postgresql":
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        status = await raw.driver_connection.copy_records_to_table(
+            model.__tablename__, records=records, columns=columns
+        )
+        return int(status.rsplit(" ", 1)[-1])
+
+    count = 0
+    block: list[dict[str, Any]] = []
+    async for record in records:
+        block.append(dict(zip(columns, record, strict=True)))
+        if len(block) == INGEST_BATCH_SIZE:
+            await session.execute(insert(model), block)
+            count += len(block)
+            block = []
+    if block:
+        await session.execute(insert(model), block)
+        count += len(block)
+    return count
 
 
 def _parse_bool(value: str | None) -> bool:
-    if value is None:
-        return False
-    return str(value).strip().lower() in {"1", "true", "yes", "y"}
+    return value is not None and value.strip().lower() in _TRUE_VALUES
 
 
 async def ingest_floor_data(
-    session: AsyncSession, marketplace_code: str, content: bytes
+    session: AsyncSession, marketplace_code: str, content: bytes | UploadFile
 ) -> int:
     """Replace uploaded floor price data for a marketplace."""
 
-    reader = _decode_csv(content)
-    required = {"SKU", "ASIN", "MIN_PRICE"}
-    missing = required - set(reader.fieldnames or [])
-    if missing:
-        raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+    positions, reader = await _decode_csv(
+        content, _REQUIRED_FLOOR_COLUMNS, ("MIN_BUSINESS_PRICE",)
+    )
+    sku_at, asin_at = positions["SKU"], positions["ASIN"]
+    price_at, business_at = positions["MIN_PRICE"], positions["MIN_BUSINESS_PRICE"]
 
     code = marketplace_code.upper()
     await session.execute(delete(TestFloorPrice).where(TestFloorPrice.marketplace_code == code))
-    count = 0
-    for row in reader:
-        sku = (row.get("SKU") or "").strip()
-        asin = (row.get("ASIN") or "").strip()
-        if not sku or not asin:
-            continue
-        min_price_value = row.get("MIN_PRICE")
-        if min_price_value in (None, ""):
-            continue
-        min_business_raw = row.get("MIN_BUSINESS_PRICE")
-        min_business_price = (
-            Decimal(str(min_business_raw))
-            if min_business_raw not in (None, "")
-            else None
-        )
-        session.add(
-            TestFloorPrice(
-                marketplace_code=code,
-                sku=sku,
-                asin=asin,
-                min_price=Decimal(str(min_price_value)),
-                min_business_price=min_business_price,
-            )
-        )
-        count += 1
+
+    async def records() -> AsyncIterator[tuple[Any, ...]]:
+        async for row in reader:
+            sku = row[sku_at].strip()
+            asin = row[asin_at].strip()
+            if not sku or not asin:
+                continue
+            min_price_value = row[price_at]
+            if not min_price_value:
+                continue
+            min_business_raw = row[business_at]
+            min_business_price = Decimal(min_business_raw) if min_business_raw else None
+            yield code, sku, asin, Decimal(min_price_value), min_business_price
+
+    count = await _write_rows(session, TestFloorPrice, _FLOOR_COLUMNS, records())
     await session.commit()
     return count
 
 
 async def ingest_competitor_data(
-    session: AsyncSession, marketplace_code: str, content: bytes
+    session: AsyncSession, marketplace_code: str, content: bytes | UploadFile
 ) -> int:
     """Replace uploaded competitor offer data for a marketplace."""
 
-    reader = _decode_csv(content)
-    required = {"ASIN", "SELLER_ID", "PRICE"}
-    missing = required - set(reader.fieldnames or [])
-    if missing:
-        raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+    positions, reader = await _decode_csv(
+        content, _REQUIRED_OFFER_COLUMNS, ("IS_BUY_BOX", "FULFILLMENT_TYPE")
+    )
+    asin_at, seller_at, price_at = positions["ASIN"], positions["SELLER_ID"], positions["PRICE"]
+    buy_box_at, fulfillment_at = positions["IS_BUY_BOX"], positions["FULFILLMENT_TYPE"]
 
     code = marketplace_code.upper()
     await session.execute(
         delete(TestCompetitorOffer).where(TestCompetitorOffer.marketplace_code == code)
     )
-    count = 0
-    for row in reader:
-        asin = (row.get("ASIN") or "").strip()
-        seller_id = (row.get("SELLER_ID") or "").strip()
-        price_raw = row.get("PRICE")
-        if not asin or not seller_id or price_raw in (None, ""):
-            continue
-        is_buy_box = _parse_bool(row.get("IS_BUY_BOX"))
-        fulfillment = (row.get("FULFILLMENT_TYPE") or "UNKNOWN").strip() or "UNKNOWN"
-        session.add(
-            TestCompetitorOffer(
-                marketplace_code=code,
-                asin=asin,
-                seller_id=seller_id,
-                price=Decimal(str(price_raw)),
-                is_buy_box=is_buy_box,
-                fulfillment_type=fulfillment,
-            )
-        )
-        count += 1
+
+    async def records() -> AsyncIterator[tuple[Any, ...]]:
+        async for row in reader:
+            asin = row[asin_at].strip()
+            seller_id = row[seller_at].strip()
+            price_raw = row[price_at]
+            if not asin or not seller_id or not price_raw:
+                continue
+            is_buy_box = _parse_bool(row[buy_box_at])
+            fulfillment = row[fulfillment_at].strip() or "UNKNOWN"
+            yield code, asin, seller_id, Decimal(price_raw), is_buy_box, fulfillment
+
+    count = await _write_rows(session, TestCompetitorOffer, _OFFER_INGEST_COLUMNS, records())
     await session.commit()
     return count
 
@@ -148,29 +295,80 @@ async def load_floor_prices(
     }
 
 
-async def load_competitor_offers(
+async def load_floor_map(session: AsyncSession, marketplace_code: str) -> dict[str, FloorPrice]:
+    """Return uploaded floors as ``{sku: (min_price, min_business_price)}``.
+
+    The shape :meth:`FTPFeedLoader.load_map` returns; only the price columns are
+    selected, so no ORM rows or records are built.
+    """
+
+    code = marketplace_code.upper()
+    rows = await session.execute(
+        select(
+            TestFloorPrice.sku, TestFloorPrice.min_price, TestFloorPrice.min_business_price
+        ).where(TestFloorPrice.marketplace_code == code)
+    )
+    return {
+        sku: (float(price), float(business) if business is not None else None)
+        for sku, price, business in rows
+    }
+
+
+# Column rows only: offers are regrouped into plain records, so ORM instances would be
+# built and dropped straight away.
+_OFFER_COLUMNS = (
+    TestCompetitorOffer.asin,
+    TestCompetitorOffer.seller_id,
+    TestCompetitorOffer.price,
+    TestCompetitorOffer.is_buy_box,
+    TestCompetitorOffer.fulfillment_type,
+)
+OFFER_STREAM_BATCH_SIZE = 1000
+
+
+async def iter_competitor_offers(
     session: AsyncSession, marketplace_code: str
-) -> dict[str, list[UploadedCompetitorOffer]]:
-    """Return uploaded competitor offers keyed by ASIN."""
+) -> AsyncIterator[tuple[str, list[UploadedCompetitorOffer]]]:
+    """Yield ``(asin, offers)`` groups straight off a server-side cursor.
+
+    Rows arrive ordered by ASIN, so only the group being assembled is held in memory.
+    """
 
     code = marketplace_code.upper()
-    rows = (
-        await session.execute(
-            select(TestCompetitorOffer).where(TestCompetitorOffer.marketplace_code == code)
-        )
-    ).scalars()
-    offers: dict[str, list[UploadedCompetitorOffer]] = defaultdict(list)
-    for row in rows:
-        offers[row.asin].append(
+    result = await session.stream(
+        select(*_OFFER_COLUMNS)
+        .where(TestCompetitorOffer.marketplace_code == code)
+        .order_by(TestCompetitorOffer.asin, TestCompetitorOffer.id)
+        .execution_options(yield_per=OFFER_STREAM_BATCH_SIZE)
+    )
+    current: str | None = None
+    group: list[UploadedCompetitorOffer] = []
+    async for asin, seller_id, price, is_buy_box, fulfillment_type in result:
+        if asin != current:
+            if group:
+                yield current, group
+            current, group = asin, []
+        group.append(
             UploadedCompetitorOffer(
-                asin=row.asin,
-                seller_id=row.seller_id,
-                price=float(row.price),
-                is_buy_box=row.is_buy_box,
-                fulfillment_type=row.fulfillment_type,
+                asin=asin,
+                seller_id=seller_id,
+                price=float(price),
+                is_buy_box=is_buy_box,
+                fulfillment_type=fulfillment_type,
             )
         )
-    return offers
+    if group:
+        yield current, group
+
+
+async def load_competitor_offers(
+    session: AsyncSession, marketplace_code: str
+) -> dict[str, list[UploadedCompetitorOffer]]:
+    """Return uploaded competitor offers keyed by ASIN."""
+
+    return {
+        asin: offers async for asin, offers in iter_competitor_offers(session, marketplace_code)
+    }
 
 
 __all__ = [
@@ -178,5 +376,7 @@ __all__ = [
     "ingest_floor_data",
     "ingest_competitor_data",
     "load_floor_prices",
+    "load_floor_map",
     "load_competitor_offers",
+    "iter_competitor_offers",
 ]
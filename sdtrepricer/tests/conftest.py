@@ -1,34 +1,52 @@
 from __future__ import annotations
 
-from collections.abc import AsyncIterator
-from pathlib import Path
-import sys
+from collections.abc import AsyncIterator, Iterator
 
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
-
-ROOT_DIR = Path(__file__).resolve().parents[2]
-if str(ROOT_DIR) not in sys.path:
-    sys.path.insert(0, str(ROOT_DIR))
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
 from sdtrepricer.app.models import Base
 
+try:
+    import uvloop  # noqa: F401
+except ImportError:  # pragma: no cover - uvloop ships with uvicorn[standard], not on Windows
+    _HAS_UVLOOP = False
+else:
+    _HAS_UVLOOP = True
+
 collect_ignore = ["../app/services/test_data.py", "../app/api/test_data.py"]
 collect_ignore_glob = ["../app/services/test_*.py", "../app/api/test_*.py"]
 
 
+class AsyncResultStream:
+    """Async view over a buffered result, standing in for ``stream``/``stream_scalars``."""
+
+    def __init__(self, result) -> None:
+        self._result = result
+
+    def __aiter__(self) -> AsyncIterator:
+        return self._rows()
+
+    async def _rows(self) -> AsyncIterator:
+        for row in self._result:
+            yield row
+
+    async def partitions(self, size: int | None = None) -> AsyncIterator[list]:
+        for partition in self._result.partitions(size):
+            yield partition
+
+
 class AsyncSessionWrapper:
     """Minimal async wrapper around a synchronous SQLAlchemy session."""
 
     def __init__(self, sync_session: Session) -> None:
         self._session = sync_session
-
-    def add(self, obj) -> None:
-        self._session.add(obj)
-
-    def add_all(self, objects) -> None:
-        self._session.add_all(objects)
+        # AsyncSession's own add/add_all are synchronous; bind them straight through.
+        self.add = sync_session.add
+        self.add_all = sync_session.add_all
+        self.bind = sync_session.bind
 
     async def execute(self, *args, **kwargs):
         return self._session.execute(*args, **kwargs)
@@ -39,6 +57,12 @@ class AsyncSessionWrapper:
     async def scalars(self, *args, **kwargs):
         return self._session.scalars(*args, **kwargs)
 
+    async def stream(self, *args, **kwargs):
+        return AsyncResultStream(self._session.execute(*args, **kwargs))
+
+    async def stream_scalars(self, *args, **kwargs):
+        return AsyncResultStream(self._session.scalars(*args, **kwargs))
+
     async def get(self, *args, **kwargs):
         return self._session.get(*args, **kwargs)
 
@@ -54,23 +78,60 @@ class AsyncSessionWrapper:
     async def refresh(self, instance) -> None:
         self._session.refresh(instance)
 
+    async def delete(self, instance) -> None:
+        self._session.delete(instance)
+
     async def close(self) -> None:
         self._session.close()
 
 
-@pytest.fixture
-async def db_session() -> AsyncIterator[AsyncSessionWrapper]:
-    engine = create_engine("sqlite:///:memory:", future=True)
+@pytest.fixture(scope="session")
+def db_engine() -> Iterator[Engine]:
+    """One in-memory database for the whole run; the schema is created once."""
+
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+
+    # pysqlite's own transaction handling skips BEGIN before SAVEPOINT; let SQLAlchemy
+    # emit it so the per-test savepoints nest properly.
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, _record) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection) -> None:
+        connection.exec_driver_sql("BEGIN")
+
     Base.metadata.create_all(engine)
-    SessionLocal = sessionmaker(bind=engine)
-    session = SessionLocal()
     try:
-        yield AsyncSessionWrapper(session)
+        yield engine
     finally:
-        session.close()
         engine.dispose()
 
 
 @pytest.fixture
-def anyio_backend() -> str:
-    return "asyncio"
+async def db_session(db_engine: Engine) -> AsyncIterator[AsyncSessionWrapper]:
+    # Each test runs inside an outer transaction that is rolled back afterwards; the
+    # session's own commits only release savepoints within it. Flush and expiry
+    # behaviour match the app's sessionmaker, so seeding is one flush at commit.
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False,
+        autoflush=False,
+    )
+    try:
+        yield AsyncSessionWrapper(session)
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> tuple[str, dict[str, bool]]:
+    # Same loop the app gets under ``uvicorn[standard]``; the stdlib loop otherwise.
+    return "asyncio", {"use_uvloop": _HAS_UVLOOP}
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from sdtrepricer.app.api import api_router
+from sdtrepricer.app.dependencies import (
+    get_db,
+    get_db_factory,
+    get_sp_api_client,
+    get_sp_api_factory,
+)
+from sdtrepricer.app.models import Marketplace, PriceEvent, Sku
+
+
+class StubSPAPI:
+    def __init__(self, rejected: frozenset[str] = frozenset()) -> None:
+        self.updates: list[tuple[str, str, float, float | None]] = []
+        self.rejected = rejected
+
+    async def submit_price_update(
+        self, marketplace_id: str, sku: str, price: float, business_price: float | None
+    ):
+        if sku in self.rejected:
+            raise RuntimeError(f"{sku} rejected")
+        self.updates.append((marketplace_id, sku, price, business_price))
+        return {"status": "OK"}
+
+    async def close(self) -> None:
+        return None
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("rejected", "status", "stored_price"),
+    [
+        (frozenset(), "submitted", Decimal("12.50")),
+        (frozenset({"SKU1"}), "failed", Decimal("15.00")),
+    ],
+)
+async def test_manual_price_update_submits_after_commit(
+    db_session, rejected, status, stored_price
+):
+    marketplace = Marketplace(code="DE", name="Germany", amazon_id="A1")
+    sku = Sku(
+        sku="SKU1",
+        asin="ASIN1",
+        marketplace=marketplace,
+        min_price=Decimal("10.00"),
+        last_updated_price=Decimal("15.00"),
+    )
+    db_session.add_all([marketplace, sku])
+    await db_session.commit()
+
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api")
+    sp = StubSPAPI(rejected)
+
+    async def override_get_db():
+        yield db_session
+
+    @asynccontextmanager
+    async def override_session_scope():
+        yield db_session
+
+    async def create_stub():
+        return sp
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_factory] = lambda: override_session_scope
+    app.dependency_overrides[get_sp_api_factory] = lambda: create_stub
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/api/actions/manual-price",
+            json={"marketplace_code": "DE", "sku": "SKU1", "price": "12.50"},
+        )
+    assert response.status_code == 200
+    assert sp.updates == ([] if rejected else [("A1", "SKU1", 12.5, None)])
+
+    event = await db_session.scalar(select(PriceEvent))
+    assert event.old_price == Decimal("15.00")
+    assert event.context == {"source": "manual", "status": status}
+    # The SKU only takes the new price once SP-API has accepted it.
+    await db_session.refresh(sku)
+    assert sku.last_updated_price == stored_price
+
+
+@pytest.mark.anyio
+async def test_manual_price_update_batch(db_session):
+    marketplace = Marketplace(code="DE", name="Germany", amazon_id="A1")
+    skus = [
+        Sku(
+            sku=f"SKU{idx}",
+            asin=f"ASIN{idx}",
+            marketplace=marketplace,
+            min_price=Decimal("10.00"),
+            min_business_price=None,
+            last_updated_price=Decimal("15.00"),
+        )
+        for idx in range(3)
+    ]
+    db_session.add_all([marketplace, *skus])
+    await db_session.commit()
+
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api")
+    sp = StubSPAPI(frozenset({"SKU2"}))
+
+    async def override_get_db():
+        yield db_session
+
+    async def override_sp_api():
+        yield sp
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_sp_api_client] = override_sp_api
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/api/actions/manual-price/batch",
+            json=[
+                {"marketplace_code": "DE", "sku": "SKU0", "price": "12.50"},
+                {"marketplace_code": "DE", "sku": "SKU1", "price": "13.00", "business_price": "12.00"},
+                {"marketplace_code": "DE", "sku": "SKU2", "price": "14.00"},
+            ],
+        )
+        assert response.status_code == 200
+        assert sorted(update[1] for update in sp.updates) == ["SKU0", "SKU1"]
+        result = response.json()
+        assert [item["sku"] for item in result["updated"]] == ["SKU0", "SKU1"]
+        assert result["failed"] == [
+            {"marketplace_code": "DE", "sku": "SKU2", "error": "SKU2 rejected"}
+        ]
+
+        response = await client.post(
+            "/api/actions/manual-price/batch",
+            json=[{"marketplace_code": "DE", "sku": "MISSING", "price": "1.00"}],
+        )
+        assert response.status_code == 404
+
+    events = (await db_session.scalars(select(PriceEvent).order_by(PriceEvent.id))).all()
+    assert [event.reason for event in events] == ["manual", "manual"]
+    assert events[0].old_price == Decimal("15.00")
+    assert skus[1].last_updated_business_price == Decimal("12.00")
+    # The rejected SKU keeps its price and gets no event.
+    assert skus[2].last_updated_price == Decimal("15.00")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 import pytest
@@ -8,7 +9,7 @@ from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
 
 from sdtrepricer.app.api import api_router
-from sdtrepricer.app.dependencies import get_db
+from sdtrepricer.app.dependencies import get_db_factory
 from sdtrepricer.app.models import Alert, Marketplace, PriceEvent, Sku, SystemSetting
 
 
@@ -39,7 +40,7 @@ async def test_dashboard_endpoint(db_session):
     db_session.add(
         PriceEvent(
             sku=sku,
-            created_at=datetime.utcnow(),
+            created_at=datetime.now(timezone.utc),
             old_price=Decimal("10"),
             new_price=Decimal("11"),
             reason="repricer-test",
@@ -53,15 +54,16 @@ async def test_dashboard_endpoint(db_session):
 
     class StubScheduler:
         def __init__(self) -> None:
-            self.last_runs = {"DE:all": datetime.utcnow() - timedelta(minutes=5)}
+            self.last_runs = {"DE:all": datetime.now(timezone.utc) - timedelta(minutes=5)}
             self.stats = {"DE:all": {"updated": 1, "processed": 10}}
 
     app.state.scheduler = StubScheduler()
 
-    async def override_get_db():
+    @asynccontextmanager
+    async def override_session_scope():
         yield db_session
 
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_factory] = lambda: override_session_scope
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         response = await client.get("/api/metrics/dashboard")
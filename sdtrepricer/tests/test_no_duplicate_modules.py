@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import ast
+from collections import Counter
+from pathlib import Path
+
+from sdtrepricer.app.api import api_router
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+API_DIR = APP_DIR / "api"
+
+
+def test_api_modules_are_unique():
+    names = Counter(path.name.lower() for path in API_DIR.rglob("*.py"))
+    assert [name for name, count in names.items() if count > 1] == []
+
+
+def test_api_routes_are_registered_once():
+    routes = Counter(
+        (route.path, method)
+        for route in api_router.routes
+        for method in getattr(route, "methods", None) or ()
+    )
+    assert [route for route, count in routes.items() if count > 1] == []
+
+
+def test_modules_define_each_name_once():
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    duplicates = []
+    for path in APP_DIR.rglob("*.py"):
+        scopes = [ast.parse(path.read_text(encoding="utf-8"))]
+        while scopes:
+            scope = scopes.pop()
+            names = Counter()
+            for node in scope.body:
+                if isinstance(node, definitions):
+                    names[node.name] += 1
+                    if isinstance(node, ast.ClassDef):
+                        scopes.append(node)
+            duplicates += [(path.name, name) for name, count in names.items() if count > 1]
+    assert duplicates == []
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from decimal import Decimal
 
 import pytest
@@ -8,7 +9,8 @@ from httpx import ASGITransport, AsyncClient
 
 from sdtrepricer.app.api import api_router
 from sdtrepricer.app.dependencies import get_db
-from sdtrepricer.app.models import Marketplace, Sku
+from sdtrepricer.app.models import Marketplace, RepricingProfile, Sku
+from sdtrepricer.app.services.scheduler import RepricingScheduler
 
 
 @pytest.mark.anyio
@@ -76,3 +78,53 @@ async def test_profile_crud_and_assignment(db_session):
         assert response.status_code == 200
         profiles = response.json()
         assert any(item["sku_count"] == 1 for item in profiles if item["id"] == profile_id)
+
+
+@pytest.mark.anyio
+async def test_deleted_profile_leaves_the_cached_schedule(db_session, monkeypatch):
+    marketplace = Marketplace(code="DE", name="Germany", amazon_id="A1")
+    profile = RepricingProfile(
+        name="Clearance",
+        frequency_minutes=30,
+        aggressiveness={"undercut_percent": 1.0},
+        price_change_limit_percent=Decimal("20.0"),
+        margin_policy={"min_margin_percent": 0.0},
+        step_up_percentage=Decimal("2.0"),
+        step_up_interval_hours=6,
+    )
+    sku = Sku(
+        sku="SKU-CLEARANCE",
+        asin="ASIN-CLEARANCE",
+        marketplace=marketplace,
+        profile=profile,
+        min_price=Decimal("9.99"),
+    )
+    db_session.add_all([marketplace, profile, sku])
+    await db_session.commit()
+
+    @asynccontextmanager
+    async def fake_session():
+        yield db_session
+
+    monkeypatch.setattr("sdtrepricer.app.services.scheduler.get_session", fake_session)
+    scheduler = RepricingScheduler()
+    plan = await scheduler._load_schedule()
+    assert [profile_id for profile_id, _ in plan["DE"]] == [profile.id]
+
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api")
+    app.state.scheduler = scheduler
+
+    async def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    # The SKU leaves outside the API (e.g. a delisting), which frees the profile.
+    await db_session.delete(sku)
+    await db_session.commit()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.delete(f"/api/profiles/{profile.id}")
+        assert response.status_code == 200
+
+    assert (await scheduler._load_schedule())["DE"] == []
@@ -1,17 +1,21 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 import pytest
 from sqlalchemy import select
 
-from sdtrepricer.app.models import Marketplace, PriceEvent, RepricingProfile, Sku
-
+from sdtrepricer.app.models import Alert, Marketplace, PriceEvent, RepricingProfile, Sku
 from sdtrepricer.app.services.ftp_loader import FloorPriceRecord
 from sdtrepricer.app.services.repricer import PricingStrategy, Repricer
+from sdtrepricer.app.services.sp_api import ListingsSubmissionError
 from sdtrepricer.app.services.test_data import ingest_competitor_data, ingest_floor_data
 
+# Uploaded test-mode datasets, built once; parametrized ingest scenarios can share them.
+_FLOOR_CSV_BASIC = b"SKU,ASIN,MIN_PRICE,MIN_BUSINESS_PRICE\nSKU1,ASIN1,11.00,12.50\n"
+_COMP_CSV_BASIC = b"ASIN,SELLER_ID,PRICE,IS_BUY_BOX,FULFILLMENT_TYPE\nASIN1,S1,18.00,false,FBA\n"
+
 
 class StubFTP:
     def __init__(self, floor: FloorPriceRecord) -> None:
@@ -25,38 +29,38 @@ class StubFTP:
     def load(self, marketplace_code: str):  # pragma: no cover - generator
         yield self.floor
 
+    def load_map(self, marketplace_code: str) -> dict[str, tuple[float, float | None]]:
+        return {self.floor.sku: (self.floor.min_price, self.floor.min_business_price)}
+
 
 class StubSPAPI:
-    def __init__(self, competitor_price: float = 18.0) -> None:
+    def __init__(
+        self, competitor_price: float = 18.0, rejected: frozenset[str] = frozenset()
+    ) -> None:
         self.updates: list[tuple[str, float, float | None]] = []
         self.competitor_price = competitor_price
+        self.rejected = rejected
+        # Built once; the repricer only reads offers. Each call gets its own outer entry
+        # because chunk fetches run concurrently with different ASINs.
+        self.offers = [
+            {"sellerId": "A", "isBuyBoxWinner": True, "listingPrice": {"amount": 20.0}},
+            {
+                "sellerId": "B",
+                "isBuyBoxWinner": False,
+                "listingPrice": {"amount": competitor_price},
+            },
+        ]
 
     async def get_competitive_pricing(self, marketplace_id: str, asins: list[str]):
-        return {
-            "data": [
-                {
-                    "asin": asins[0],
-                    "offers": [
-                        {
-                            "sellerId": "A",
-                            "isBuyBoxWinner": True,
-                            "listingPrice": {"amount": 20.0},
-                        },
-                        {
-                            "sellerId": "B",
-                            "isBuyBoxWinner": False,
-                            "listingPrice": {"amount": self.competitor_price},
-                        },
-                    ],
-                }
-            ]
-        }
+        return {"data": [{"asin": asins[0], "offers": self.offers}]}
 
     async def submit_price_update(
         self, marketplace_id: str, sku: str, price: float, business_price: float | None
     ):
+        if sku in self.rejected:
+            raise ListingsSubmissionError(f"{sku} rejected")
         self.updates.append((sku, price, business_price))
-        return {"status": "OK"}
+        return {"status": "ACCEPTED"}
 
     async def close(self):  # pragma: no cover - compatibility
         return None
@@ -69,6 +73,9 @@ class RejectingFTP:
     def load(self, marketplace_code: str):  # pragma: no cover - safety
         raise AssertionError("FTP loader should not be used in test mode")
 
+    def load_map(self, marketplace_code: str):  # pragma: no cover - safety
+        raise AssertionError("FTP loader should not be used in test mode")
+
 
 class RejectingSPAPI:
     async def get_competitive_pricing(self, marketplace_id: str, asins: list[str]):  # pragma: no cover
@@ -87,7 +94,6 @@ class RejectingSPAPI:
 async def test_repricer_updates_prices(db_session):
     marketplace = Marketplace(code="DE", name="Germany", amazon_id="A1")
     profile = RepricingProfile(
-
         name="Default",
         frequency_minutes=60,
         aggressiveness={"undercut_percent": 0.5},
@@ -95,8 +101,9 @@ async def test_repricer_updates_prices(db_session):
         margin_policy={"min_margin_percent": 0.0},
         step_up_percentage=Decimal("2.0"),
         step_up_interval_hours=6,
-
     )
+    # Holding the Buy Box with the last change 8h old: the profile's 6h step-up is
+    # due, so the price steps up 2% from 15.00.
     sku = Sku(
         sku="SKU1",
         asin="ASIN1",
@@ -106,8 +113,7 @@ async def test_repricer_updates_prices(db_session):
         min_business_price=Decimal("12.00"),
         last_updated_price=Decimal("15.00"),
         hold_buy_box=True,
-        last_price_update=datetime.utcnow() - timedelta(hours=2),
-        repricing_profile=profile,
+        last_price_update=datetime.now(timezone.utc) - timedelta(hours=8),
     )
     db_session.add_all([marketplace, profile, sku])
     await db_session.commit()
@@ -119,17 +125,87 @@ async def test_repricer_updates_prices(db_session):
     result = await repricer.run_marketplace("DE")
     assert result["updated"] == 1
     assert ftp.checked
+    assert sp.updates == [("SKU1", 15.3, 15.3)]
+
+    # refresh() re-reads the row, so this checks what the UPDATE actually persisted.
     await db_session.refresh(sku)
-    assert float(sku.last_updated_price) == 17.0
+    assert sku.last_updated_price == Decimal("15.30")
+    assert sku.last_updated_business_price == Decimal("15.30")
 
     events = (await db_session.scalars(select(PriceEvent))).all()
     assert len(events) == 1
     assert events[0].reason == "repricer"
-    assert sp.updates[0][0] == "SKU1"
+    assert events[0].old_price == Decimal("15.00")
+    assert events[0].new_price == Decimal("15.30")
 
 
 @pytest.mark.anyio
+async def test_repricer_keeps_rejected_submissions_unpriced(db_session):
+    marketplace = Marketplace(code="DE", name="Germany", amazon_id="A1")
+    skus = [
+        Sku(
+            sku=code,
+            asin="ASIN1",
+            marketplace=marketplace,
+            min_price=Decimal("10.00"),
+            last_updated_price=Decimal("15.00"),
+        )
+        for code in ("SKU1", "SKU2")
+    ]
+    db_session.add_all([marketplace, *skus])
+    await db_session.commit()
 
+    ftp = StubFTP(FloorPriceRecord("SKU1", "ASIN1", 10.0, None))
+    ftp.load_map = lambda code: {sku.sku: (10.0, None) for sku in skus}
+    sp = StubSPAPI(rejected=frozenset({"SKU2"}))
+    repricer = Repricer(db_session, sp, ftp, PricingStrategy())
+
+    result = await repricer.run_marketplace("DE")
+    assert [update[0] for update in sp.updates] == ["SKU1"]
+    assert (result["updated"], result["errors"]) == (1, 1)
+
+    # Only the accepted SKU moves; the rejected one keeps its price and gets no event.
+    for sku in skus:
+        await db_session.refresh(sku)
+    assert skus[0].last_updated_price == Decimal("17.91")
+    assert skus[1].last_updated_price == Decimal("15.00")
+    events = (await db_session.scalars(select(PriceEvent))).all()
+    assert [event.sku_id for event in events] == [skus[0].id]
+    alerts = (await db_session.scalars(select(Alert))).all()
+    assert any(alert.metadata_payload == {"skus": ["SKU2"]} for alert in alerts)
+
+
+@pytest.mark.anyio
+async def test_repricer_test_mode_uses_uploaded_data(db_session):
+    marketplace = Marketplace(code="DE", name="Germany", amazon_id="A1")
+    sku = Sku(
+        sku="SKU1",
+        asin="ASIN1",
+        marketplace=marketplace,
+        min_price=Decimal("10.00"),
+        last_updated_price=Decimal("15.00"),
+    )
+    db_session.add_all([marketplace, sku])
+    await db_session.commit()
+    assert await ingest_floor_data(db_session, "DE", _FLOOR_CSV_BASIC) == 1
+    assert await ingest_competitor_data(db_session, "DE", _COMP_CSV_BASIC) == 1
+    await db_session.commit()
+
+    repricer = Repricer(db_session, RejectingSPAPI(), RejectingFTP(), test_mode=True)
+    result = await repricer.run_marketplace("DE")
+    assert result["updated"] == 1
+
+    # Simulations only record the outcome: 18.00 less the 0.5% undercut.
+    events = (await db_session.scalars(select(PriceEvent))).all()
+    assert len(events) == 1
+    assert events[0].reason == "repricer-test"
+    assert events[0].new_price == Decimal("17.91")
+    assert events[0].new_business_price == Decimal("17.91")
+    await db_session.refresh(sku)
+    assert sku.last_updated_price == Decimal("15.00")
+
+
+@pytest.mark.anyio
 async def test_profile_aggressiveness_applied(db_session):
     marketplace = Marketplace(code="DE", name="Germany", amazon_id="A1")
     profile = RepricingProfile(
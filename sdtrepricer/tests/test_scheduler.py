@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 import pytest
 
+from sdtrepricer.app.core.config import settings
 from sdtrepricer.app.models import Marketplace, RepricingProfile, Sku
 from sdtrepricer.app.services.scheduler import RepricingScheduler
 
@@ -69,10 +71,65 @@ async def test_scheduler_uses_profile_frequency(db_session, monkeypatch):
     assert (marketplace.code, slow_profile.id) in calls
 
     calls.clear()
-    scheduler.last_runs[scheduler._key(marketplace.code, fast_profile.id)] = datetime.utcnow()
-    scheduler.last_runs[scheduler._key(marketplace.code, slow_profile.id)] = datetime.utcnow() - timedelta(
+    now = datetime.now(timezone.utc)
+    scheduler.last_runs[scheduler._key(marketplace.code, fast_profile.id)] = now
+    scheduler.last_runs[scheduler._key(marketplace.code, slow_profile.id)] = now - timedelta(
         minutes=slow_profile.frequency_minutes + 1
     )
 
     await scheduler._run_scheduled_cycle()
     assert calls == [(marketplace.code, slow_profile.id)]
+
+
+@pytest.mark.anyio
+async def test_queued_burst_runs_each_marketplace_once():
+    scheduler = RepricingScheduler()
+    handled: list[tuple[str, int | None]] = []
+
+    async def fake_handle(data):
+        handled.append((data["marketplace_code"], data.get("profile_id")))
+
+    scheduler._handle_reprice_request = fake_handle  # type: ignore[assignment]
+
+    await scheduler.handle_notification({"marketplace_code": "DE"})
+    await scheduler.handle_notification({"marketplace_code": "DE"})
+    await scheduler.trigger_marketplace("DE", profile_id=3)
+    await scheduler.trigger_marketplace("FR", profile_id=1)
+    await scheduler.trigger_marketplace("FR", profile_id=2)
+    await scheduler.trigger_marketplace("FR", profile_id=1)
+
+    await scheduler._drain_queue(await scheduler.queue.get())
+    assert scheduler.queue.empty()
+    assert sorted(handled, key=lambda item: (item[0], item[1] or 0)) == [
+        ("DE", None),
+        ("FR", 1),
+        ("FR", 2),
+    ]
+
+
+
+@pytest.mark.anyio
+async def test_notification_storm_is_coalesced_and_rate_limited(monkeypatch):
+    monkeypatch.setattr(
+        "sdtrepricer.app.services.scheduler.settings",
+        replace(settings, scheduler_notification_burst=2),
+    )
+    scheduler = RepricingScheduler()
+    handled: list[str] = []
+
+    async def fake_handle(data):
+        handled.append(data["marketplace_code"])
+
+    scheduler._handle_reprice_request = fake_handle  # type: ignore[assignment]
+
+    for _ in range(5):
+        await scheduler.handle_notification({"marketplace_code": "DE"})
+    assert scheduler.queue.qsize() == 1
+    await scheduler._drain_queue(await scheduler.queue.get())
+
+    await scheduler.handle_notification({"marketplace_code": "DE"})
+    await scheduler._drain_queue(await scheduler.queue.get())
+    # Both tokens spent within the tick: further notifications are dropped.
+    await scheduler.handle_notification({"marketplace_code": "DE"})
+    assert scheduler.queue.empty()
+    assert handled == ["DE", "DE"]
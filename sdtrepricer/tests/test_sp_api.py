@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import io
+
+import httpx
+import pytest
+
+from sdtrepricer.app.services.sp_api import ListingsSubmissionError, RateQuota, SPAPIClient
+
+
+@pytest.mark.anyio
+async def test_competitive_pricing_requests_are_coalesced():
+    calls: list[list[str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        asins = request.url.params["Asins"].split(",")
+        calls.append(asins)
+        return httpx.Response(
+            200, json={"data": [{"asin": asin, "offers": []} for asin in asins if asin != "NONE"]}
+        )
+
+    client = SPAPIClient(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    client._quota = RateQuota(rate=10.0, burst=10, restore_rate=10.0)
+    try:
+        first, second = await asyncio.gather(
+            client.get_competitive_pricing("M1", ["A", "B"]),
+            client.get_competitive_pricing("M1", ["B", "C", "NONE"]),
+        )
+    finally:
+        await client.close()
+
+    assert calls == [["A", "B", "C", "NONE"]]
+    assert [entry["asin"] for entry in first["data"]] == ["A", "B"]
+    assert [entry["asin"] for entry in second["data"]] == ["B", "C"]
+
+
+@pytest.mark.anyio
+async def test_rate_limits_are_tracked_per_operation_and_marketplace():
+    client = SPAPIClient(
+        httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+    )
+    try:
+        # Default quota is a single-token burst; these would otherwise wait ten seconds
+        # each behind one another.
+        await asyncio.wait_for(
+            asyncio.gather(
+                client.submit_price_update("M1", "SKU1", 10.0, None),
+                client.submit_price_update("M2", "SKU1", 10.0, None),
+                client.acknowledge_notification("N1"),
+            ),
+            timeout=1.0,
+        )
+    finally:
+        await client.close()
+
+    assert set(client._buckets) == {
+        ("patchListingsItem", "M1"),
+        ("patchListingsItem", "M2"),
+        ("acknowledgeNotification", ""),
+    }
+
+
+@pytest.mark.anyio
+async def test_bulk_feed_is_resent_whole_on_retry():
+    bodies: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(request.read())
+        return httpx.Response(429 if len(bodies) == 1 else 200, json={"feedDocumentId": "F1"})
+
+    client = SPAPIClient(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    client._quota = RateQuota(rate=10.0, burst=10, restore_rate=10.0)
+    feed = b"sku,price\nSKU1,10.00\n"
+    try:
+        response = await client.submit_bulk_feed(io.BytesIO(feed), "text/csv")
+    finally:
+        await client.close()
+
+    assert response == {"feedDocumentId": "F1"}
+    # Each attempt is a fresh multipart body, so compare the document inside it.
+    assert len(bodies) == 2
+    assert all(feed in body for body in bodies)
+
+
+@pytest.mark.anyio
+async def test_invalid_listings_submission_raises():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, json={"sku": "SKU1", "status": "INVALID", "issues": [{"code": "90220"}]}
+        )
+
+    client = SPAPIClient(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    client._quota = RateQuota(rate=10.0, burst=10, restore_rate=10.0)
+    try:
+        with pytest.raises(ListingsSubmissionError, match="SKU1"):
+            await client.submit_price_update("M1", "SKU1", 10.0, None)
+    finally:
+        await client.close()
+
+
+@pytest.mark.anyio
+async def test_failed_pricing_fetch_for_cancelled_caller_is_not_reported():
+    loop = asyncio.get_running_loop()
+    reported: list[dict] = []
+    previous_handler = loop.get_exception_handler()
+    loop.set_exception_handler(lambda _, context: reported.append(context))
+    client = SPAPIClient(
+        httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+    )
+    try:
+        caller = asyncio.create_task(client.get_competitive_pricing("M1", ["A"]))
+        await asyncio.sleep(0)
+        caller.cancel()
+        # Send the queued ASIN now rather than after the coalescing window.
+        client._flush_pricing("M1")
+        await asyncio.gather(*client._pricing_tasks)
+        del caller
+        gc.collect()
+    finally:
+        loop.set_exception_handler(previous_handler)
+        await client.close()
+
+    assert reported == []
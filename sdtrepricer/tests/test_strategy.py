@@ -9,37 +9,52 @@ from sdtrepricer.app.models import Sku
 from sdtrepricer.app.services.ftp_loader import FloorPriceRecord
 from sdtrepricer.app.services.repricer import CompetitorOffer, PricingStrategy
 
+# Shared price constants; Decimal is immutable, so every test can reuse the same objects.
+D10, D12, D15, D20 = map(Decimal, ("10.00", "12.00", "15.00", "20.00"))
+CENT = Decimal("0.01")
+
 
 def build_sku(**kwargs):
     defaults = {
         "sku": "SKU123",
         "asin": "ASIN123",
         "marketplace_id": 1,
-        "min_price": Decimal("10.00"),
-        "min_business_price": Decimal("12.00"),
+        "min_price": D10,
+        "min_business_price": D12,
     }
     defaults.update(kwargs)
     return Sku(**defaults)
 
 
-def test_competitor_undercut():
-    sku = build_sku(last_updated_price=Decimal("15.00"))
+@pytest.fixture(scope="module")
+def now() -> datetime:
+    # A fixed clock, passed to the strategy, so step-up windows never straddle a boundary.
+    return datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture(scope="module")
+def default_strategy() -> PricingStrategy:
+    # Pricing keeps no per-SKU state on the strategy, so the default one is shared.
+    return PricingStrategy()
+
+
+def test_competitor_undercut(default_strategy):
+    sku = build_sku(last_updated_price=D15)
     floor = FloorPriceRecord("SKU123", "ASIN123", 10.0, 12.0)
     offers = [
         CompetitorOffer("sellerA", 14.50, False, "FBA"),
         CompetitorOffer("sellerB", 16.00, True, "FBM"),
     ]
-    strategy = PricingStrategy()
-    result = strategy.determine_price(sku, offers, floor)
-    assert result.new_price < Decimal("15.00")
-    assert result.new_price >= Decimal("10.00")
+    result = default_strategy.determine_price(sku, offers, floor)
+    assert result.new_price < D15
+    assert result.new_price >= D10
 
 
-def test_buy_box_percentage_step_up():
+def test_buy_box_percentage_step_up(now):
     sku = build_sku(
         hold_buy_box=True,
-        last_updated_price=Decimal("20.00"),
-        last_price_update=datetime.utcnow() - timedelta(hours=8),
+        last_updated_price=D20,
+        last_price_update=now - timedelta(hours=8),
     )
     floor = FloorPriceRecord("SKU123", "ASIN123", 10.0, 12.0)
     strategy = PricingStrategy(
@@ -48,16 +63,16 @@ def test_buy_box_percentage_step_up():
         step_up_interval_hours=6,
         max_daily_change_percent=100,
     )
-    result = strategy.determine_price(sku, [], floor)
+    result = strategy.determine_price(sku, [], floor, now=now)
     assert result.new_price >= Decimal("21.00")
     assert result.context["step_up"]["type"] == "percentage"
 
 
-def test_buy_box_absolute_step_up():
+def test_buy_box_absolute_step_up(now):
     sku = build_sku(
         hold_buy_box=True,
-        last_updated_price=Decimal("20.00"),
-        last_price_update=datetime.utcnow() - timedelta(hours=8),
+        last_updated_price=D20,
+        last_price_update=now - timedelta(hours=8),
     )
     floor = FloorPriceRecord("SKU123", "ASIN123", 10.0, 12.0)
     strategy = PricingStrategy(
@@ -66,16 +81,16 @@ def test_buy_box_absolute_step_up():
         step_up_interval_hours=4,
         max_daily_change_percent=100,
     )
-    result = strategy.determine_price(sku, [], floor)
+    result = strategy.determine_price(sku, [], floor, now=now)
     assert result.new_price == Decimal("22.50")
     assert result.context["step_up"]["type"] == "absolute"
 
 
-def test_step_up_interval_enforced():
+def test_step_up_interval_enforced(now):
     sku = build_sku(
         hold_buy_box=True,
-        last_updated_price=Decimal("20.00"),
-        last_price_update=datetime.utcnow() - timedelta(hours=1),
+        last_updated_price=D20,
+        last_price_update=now - timedelta(hours=1),
     )
     floor = FloorPriceRecord("SKU123", "ASIN123", 10.0, 12.0)
     strategy = PricingStrategy(
@@ -84,15 +99,79 @@ def test_step_up_interval_enforced():
         step_up_interval_hours=6,
         max_daily_change_percent=100,
     )
-    result = strategy.determine_price(sku, [], floor)
-    assert result.new_price == Decimal("20.00")
+    result = strategy.determine_price(sku, [], floor, now=now)
+    assert result.new_price == D20
     assert result.context["step_up_candidate"] is None
 
 
 def test_daily_threshold_is_enforced():
-    sku = build_sku(last_updated_price=Decimal("20.00"))
+    sku = build_sku(last_updated_price=D20)
     floor = FloorPriceRecord("SKU123", "ASIN123", 10.0, 12.0)
     offers = [CompetitorOffer("sellerA", 40.0, False, "FBA")]
     strategy = PricingStrategy(max_daily_change_percent=10)
     result = strategy.determine_price(sku, offers, floor)
     assert float(result.new_price) <= 22.0001
+
+
+@pytest.mark.parametrize("undercut", [0.5, 1.5, 2.5])
+def test_batch_pricing_matches_scalar_path(now, undercut):
+    floor = FloorPriceRecord("SKU123", "ASIN123", 10.0, 12.0)
+    items = [
+        (
+            build_sku(last_updated_price=D15),
+            [CompetitorOffer("sellerA", 14.50, False, "FBA")],
+            floor,
+        ),
+        (
+            build_sku(
+                hold_buy_box=True,
+                last_updated_price=D20,
+                last_price_update=now - timedelta(hours=8),
+            ),
+            [],
+            floor,
+        ),
+        (
+            build_sku(last_updated_price=D20),
+            [CompetitorOffer("sellerA", 40.0, False, "FBA")],
+            floor,
+        ),
+        (build_sku(), [], FloorPriceRecord("SKU123", "ASIN123", 11.0, None)),
+    ]
+    # Undercuts landing on (or a float error away from) half a cent, which the scalar
+    # path rounds up: 11.00 less 0.5% is 10.945 and must price at 10.95.
+    half_cent = len(items)
+    items += [
+        (build_sku(), [CompetitorOffer("sellerA", cents / 100, False, "FBA")], floor)
+        for cents in (1100, *range(1001, 5000, 7))
+    ]
+    strategy = PricingStrategy(max_daily_change_percent=10, undercut_percent=undercut)
+    batch = strategy.determine_prices(items, now=now)
+    for (sku, offers, record), computed in zip(items, batch, strict=True):
+        expected = strategy.determine_price(sku, offers, record, now=now)
+        assert computed.new_price == expected.new_price.quantize(CENT)
+        if expected.new_business_price is None:
+            assert computed.new_business_price is None
+        else:
+            assert computed.new_business_price == expected.new_business_price.quantize(CENT)
+        assert computed.context == expected.context
+    if undercut == 0.5:
+        assert batch[half_cent].new_price == Decimal("10.95")
+
+
+def test_steady_state_sku_is_skipped(default_strategy):
+    floor = FloorPriceRecord("SKU123", "ASIN123", 10.0, 12.0)
+    buy_box_only = [CompetitorOffer("sellerB", 9.0, True, "FBM")]
+    items = [
+        (build_sku(last_updated_price=D15), buy_box_only, floor),
+        (build_sku(last_updated_price=D15), [], floor),
+    ]
+    scalar = default_strategy.determine_price(*items[0])
+    assert scalar.new_price is None
+    assert scalar.context == {"skipped": "noop"}
+    batch = default_strategy.determine_prices(items)
+    assert [result.new_price for result in batch] == [None, None]
+    # Test-mode runs price them anyway so every SKU gets its simulated event.
+    priced = default_strategy.determine_prices(items, skip_noop=False)
+    assert [result.new_price for result in priced] == [D15, D15]
+    assert default_strategy.determine_price(*items[0], skip_noop=False).new_price == D15
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from sdtrepricer.app.api import api_router
+from sdtrepricer.app.dependencies import get_db
+from sdtrepricer.app.services import test_data
+from sdtrepricer.app.services.test_data import load_competitor_offers, load_floor_map
+
+# Multipart bodies for the upload endpoints, built once. The quoted ASIN cell spans a
+# line break and the file ends without one.
+_FLOOR_UPLOAD = (
+    "\ufeffSKU,ASIN,MIN_PRICE,MIN_BUSINESS_PRICE\r\n"
+    'SKU1,ASIN1,11.00,12.50\r\nSKU2,"ASIN\r\n2",9.50,\r\nSKU3,ASIN3,7.25,8.00'
+).encode()
+_COMPETITOR_UPLOAD = (
+    b"ASIN,SELLER_ID,PRICE,IS_BUY_BOX\nASIN1,S1,18.00,true\nASIN1,S2,17.50,no\n"
+)
+
+
+@pytest.mark.anyio
+async def test_csv_uploads_are_ingested_through_the_endpoints(db_session, monkeypatch):
+    # Tiny reads so rows, the BOM and the CRLF pairs are split across chunks.
+    monkeypatch.setattr(test_data, "UPLOAD_READ_SIZE", 5)
+
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api")
+
+    async def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/api/test-data/floor",
+            params={"marketplace_code": "de"},
+            files={"file": ("floor.csv", _FLOOR_UPLOAD, "text/csv")},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"records": 3}
+
+        response = await client.post(
+            "/api/test-data/competitors",
+            params={"marketplace_code": "DE"},
+            files={"file": ("offers.csv", _COMPETITOR_UPLOAD, "text/csv")},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"records": 2}
+
+        response = await client.post(
+            "/api/test-data/floor",
+            params={"marketplace_code": "DE"},
+            files={"file": ("floor.csv", b"SKU,ASIN\nSKU1,ASIN1\n", "text/csv")},
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Missing required columns: MIN_PRICE"
+
+    # The rejected upload failed before replacing anything.
+    assert await load_floor_map(db_session, "DE") == {
+        "SKU1": (11.0, 12.5),
+        "SKU2": (9.5, None),
+        "SKU3": (7.25, 8.0),
+    }
+    offers = (await load_competitor_offers(db_session, "DE"))["ASIN1"]
+    assert [(offer.seller_id, offer.is_buy_box) for offer in offers] == [
+        ("S1", True),
+        ("S2", False),
+    ]
+    assert offers[0].price == 18.0
+    assert offers[1].fulfillment_type == "UNKNOWN"